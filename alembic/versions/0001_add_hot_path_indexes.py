@@ -0,0 +1,47 @@
+"""Add indexes on hot foreign keys and filter columns
+
+Revision ID: 0001_add_hot_path_indexes
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_add_hot_path_indexes"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) - names match the ones generated from the models,
+# so databases created with Base.metadata.create_all() are left untouched.
+INDEXES = [
+    ("ix_suggestions_user_id_created_at", "suggestions", ["user_id", "created_at"]),
+    ("ix_suggestions_habit_id", "suggestions", ["habit_id"]),
+    ("ix_habits_user_id", "habits", ["user_id"]),
+    ("ix_habits_category_id", "habits", ["category_id"]),
+    ("ix_habit_series_habit_id", "habit_series", ["habit_id"]),
+    ("ix_habit_series_user_id", "habit_series", ["user_id"]),
+    (
+        "ix_habit_exceptions_habit_series_id_date",
+        "habit_exceptions",
+        ["habit_series_id", "date"],
+    ),
+    ("ix_habit_plans_category_id", "habit_plans", ["category_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,37 @@
+"""Add suggestion_snapshots for precomputed suggestions
+
+Revision ID: 0003_add_suggestion_snapshots
+Revises: 0002_add_habit_fingerprints
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_add_suggestion_snapshots"
+down_revision: Union[str, None] = "0002_add_habit_fingerprints"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "suggestion_snapshots",
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("fingerprint", sa.String(), nullable=False),
+        sa.Column("suggestions", sa.Text(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("generated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("suggestion_snapshots", if_exists=True)
@@ -0,0 +1,42 @@
+"""Add analysis_inputs for the nightly suggestion pre-generation
+
+Revision ID: 0004_add_analysis_inputs
+Revises: 0003_add_suggestion_snapshots
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_add_analysis_inputs"
+down_revision: Union[str, None] = "0003_add_suggestion_snapshots"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "analysis_inputs",
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("received_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_analysis_inputs_received_at",
+        "analysis_inputs",
+        ["received_at"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_analysis_inputs_received_at", "analysis_inputs", if_exists=True)
+    op.drop_table("analysis_inputs", if_exists=True)
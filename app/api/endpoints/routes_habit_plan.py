@@ -1,39 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.schemas.habit_plan_schema import HabitPlanResponse
 from app.services.habit_plan_service import (
-    get_habit_plans,
-    get_habit_plan_by_id,
-    get_habit_plans_by_category,
+    HabitPlanPayload,
+    get_habit_plans_payload,
+    get_habit_plan_payload_by_id,
+    get_habit_plans_payload_by_category,
 )
 from app.dependencies import get_db
+from app.utils.static_files import ImageVariant
 
 router = APIRouter(prefix="/habit-plans", tags=["Habit Plans"])
 
 
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _payload_response(
+    payload: HabitPlanPayload, if_none_match: Optional[str]
+) -> Response:
+    """
+    Serve the pre-encoded body, or 304 when the client already has it.
+    Bypasses response_model validation and encoding, which were done at cache-fill time.
+    """
+    # no-cache: clients may store the response but must revalidate it with the ETag
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(payload.etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
 @router.get("/", response_model=List[HabitPlanResponse])
 def read_habit_plans(
     category_id: Optional[str] = Query(None, description="Filter by category ID"),
     skip: int = Query(0, description="Number of records to skip"),
     limit: int = Query(100, description="Maximum number of records to return"),
+    image_variant: Optional[ImageVariant] = Query(
+        None, description="Smaller pre-generated image to link in imagePath"
+    ),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """
     Get all habit plans, with optional filtering by category.
     """
     if category_id:
-        return get_habit_plans_by_category(db, category_id)
-    return get_habit_plans(db, skip=skip, limit=limit)
+        payload = get_habit_plans_payload_by_category(
+            db, category_id, skip=skip, limit=limit, image_variant=image_variant
+        )
+    else:
+        payload = get_habit_plans_payload(
+            db, skip=skip, limit=limit, image_variant=image_variant
+        )
+    return _payload_response(payload, if_none_match)
 
 
 @router.get("/{plan_id}", response_model=HabitPlanResponse)
-def read_habit_plan(plan_id: str, db: Session = Depends(get_db)):
+def read_habit_plan(
+    plan_id: str,
+    image_variant: Optional[ImageVariant] = Query(
+        None, description="Smaller pre-generated image to link in imagePath"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
     """
     Get a specific habit plan by ID.
     """
-    db_plan = get_habit_plan_by_id(db, plan_id)
-    if db_plan is None:
+    payload = get_habit_plan_payload_by_id(db, plan_id, image_variant=image_variant)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Habit plan not found")
-    return db_plan
+    return _payload_response(payload, if_none_match)
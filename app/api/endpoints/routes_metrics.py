@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.utils.metrics import render_metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Prometheus metrics: request latency per route, in-flight requests, DB pool usage,
+    AI calls/latency/tokens per model, suggestion fallbacks and cache hits.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,25 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.schemas.habit_analysis_input_schema import HabitAnalysisInput
 from app.schemas.suggestion_schema import SuggestionResponse
 
+from app.services.analysis_input_service import store_analysis_input
 from app.services.habit_service import calculate_performance_metrics
 from app.services.suggestion_service import (
     generate_and_save_suggestions,
     generate_suggestions,
     get_suggestion_by_user,
 )
+from app.services.suggestion_snapshot import SUGGESTION_SNAPSHOTS_ENABLED
 from app.dependencies import get_db
+from app.utils.responses import model_json_response
+from app.utils.logger import Payload
+from app.utils.tracing import span
 from app.models.user import User  # Import the User model
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/suggestions", tags=["Suggestions"])
 
 
 @router.post("/analyze", response_model=List[SuggestionResponse])
 async def analyze_and_suggest(
-    habitAnalysisInput: HabitAnalysisInput, db: Session = Depends(get_db)
+    habitAnalysisInput: HabitAnalysisInput,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
 ):
     """
     Analyze habits, automatically calculate performance metrics, generate suggestions and save everything to DB.
@@ -33,25 +44,37 @@ async def analyze_and_suggest(
     - suggestions: List of generated suggestions
     """
 
-    print("Received habit analysis input:", habitAnalysisInput)
+    logger.debug(
+        "Received habit analysis input for user %s: %d habits %s",
+        habitAnalysisInput.user_id,
+        len(habitAnalysisInput.habits),
+        Payload(habitAnalysisInput.habits),
+    )
 
     # Check if the user exists, if not, create one
-    user = db.query(User).filter(User.id == habitAnalysisInput.user_id).first()
-    if not user:
-        print(
-            f"User with id '{habitAnalysisInput.user_id}' not found. Creating new user."
-        )
-        new_user = User(
-            id=habitAnalysisInput.user_id,
-            name=f"User {habitAnalysisInput.user_id}",  # Or some default name
-            # Add other default fields for User if necessary
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        print(f"Created new user: {new_user.id}")
-    else:
-        print(f"User {user.id} found.")
+    with span("user_upsert"):
+        user = db.query(User).filter(User.id == habitAnalysisInput.user_id).first()
+        if not user:
+            logger.info(
+                "User with id '%s' not found. Creating new user.",
+                habitAnalysisInput.user_id,
+            )
+            new_user = User(
+                id=habitAnalysisInput.user_id,
+                name=f"User {habitAnalysisInput.user_id}",  # Or some default name
+                # Add other default fields for User if necessary
+            )
+            db.add(new_user)
+            db.commit()
+            db.refresh(new_user)
+            logger.info("Created new user: %s", new_user.id)
+        else:
+            logger.debug("User %s found.", user.id)
+
+    # Kept for the nightly pre-generation (scripts/pregenerate_suggestions.py), written
+    # in the threadpool once the response is sent
+    if SUGGESTION_SNAPSHOTS_ENABLED:
+        background_tasks.add_task(store_analysis_input, habitAnalysisInput)
 
     # 1. Calculate Performance Metrics from habits (Rule-Based or Pre-defined Logic)
     habitInputUpdate: HabitAnalysisInput = calculate_performance_metrics(
@@ -64,9 +87,9 @@ async def analyze_and_suggest(
     )
     # suggestions = await generate_suggestions(habitAnalysisInput=habitInputUpdate)
 
-    print("Generated suggestions:", suggestions)
+    logger.debug("Generated suggestions: %s", Payload(suggestions))
 
-    return suggestions
+    return model_json_response(List[SuggestionResponse], suggestions)
 
 
 @router.get("/", response_model=List[SuggestionResponse])
@@ -75,4 +98,4 @@ def get_suggestions(user_id: str = Query(...), db: Session = Depends(get_db)):
     Get all suggestions for a specific user from the database.
     """
     suggestions = get_suggestion_by_user(db, user_id)
-    return suggestions
+    return model_json_response(List[SuggestionResponse], suggestions)
@@ -1,7 +1,10 @@
 import os
+import uuid
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import String, create_engine
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.types import TypeDecorator
 
 # Load .env file
 load_dotenv()
@@ -11,8 +14,53 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("❌ ERROR: DATABASE_URL is not set! Please check your .env file.")
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Store server-generated IDs as native PostgreSQL UUID (16 bytes) instead of 36-char text.
+# Enable only after running scripts/migrate_native_uuid.py on an existing database.
+USE_NATIVE_UUID = os.getenv("USE_NATIVE_UUID", "false").lower() == "true"
+
+# Namespace used to turn legacy non-UUID IDs (e.g. "sugg_water") into stable UUIDs
+LEGACY_ID_NAMESPACE = uuid.UUID("6f1c2a4e-9d3b-5e7a-8c41-2b7f0d9e6a13")
+
+# Logs every SQL statement; useful locally, far too much I/O for production
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+engine = create_engine(DATABASE_URL, echo=DB_ECHO)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+def to_uuid_string(value: str) -> str:
+    """
+    Normalize an ID to its canonical UUID string.
+    Legacy IDs that are not UUIDs are mapped deterministically with uuid5, so old
+    references keep resolving after migrating to native UUID columns.
+    """
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return str(uuid.uuid5(LEGACY_ID_NAMESPACE, value))
+
+
+class UUIDString(TypeDecorator):
+    """
+    ID column that is always a string at the API boundary.
+    Uses native UUID on PostgreSQL when USE_NATIVE_UUID is enabled, plain String otherwise.
+    """
+
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if USE_NATIVE_UUID and dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not (USE_NATIVE_UUID and dialect.name == "postgresql"):
+            return value
+        return to_uuid_string(value)
+
+    def process_result_value(self, value, dialect):
+        return str(value) if value is not None else None
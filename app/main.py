@@ -1,15 +1,41 @@
+import os
 from fastapi import FastAPI
-from fastapi.responses import FileResponse, JSONResponse
-from app.api.endpoints import routes_habit, routes_suggestion, routes_habit_plan
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
+from app.api.endpoints import (
+    routes_habit,
+    routes_suggestion,
+    routes_habit_plan,
+    routes_metrics,
+)
 from app.database import engine, Base
 from app.models import *
-from fastapi.staticfiles import StaticFiles
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.utils.static_files import PrecompressedStaticFiles
+from app.utils.logger import setup_logging
+from app.utils.metrics import instrument_pool
+from app.services.ai_client import AI_DEADLINE_RESERVE_SECONDS
+from app.utils.deadline import instrument_statements
+from app.utils.tracing import instrument_engine
+
+setup_logging()
+
+# Before create_all below, so its connection is counted and timed as well
+instrument_engine(engine)
+instrument_pool(engine)
+# Statements of a request may not outlive its deadline (see DeadlineMiddleware), except
+# the fallback queries run in the reserve AI calls leave for them
+instrument_statements(engine, AI_DEADLINE_RESERVE_SECONDS)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="LFL Backend API",
     description="API cho Habit Analysis và Suggestion",
     version="1.0.0",
+    # orjson encodes the dicts FastAPI builds from response_model much faster than stdlib json
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -37,10 +63,32 @@ async def favicon():
     )  # Update the path with your actual favicon file location
 
 
+# Compress JSON responses (brotli if installed, else gzip); small bodies aren't worth it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500")),  # bytes
+    gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),  # 1-9
+    brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),  # 0-11
+)
+
+# Prometheus metrics, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Per-request deadline for AI calls and DB statements (REQUEST_DEADLINE_SECONDS)
+app.add_middleware(DeadlineMiddleware)
+
+# Per-stage timings (db, metrics, ai.*, save, ...) as a Server-Timing header and a log line.
+# Added last so it is the outermost middleware and its total includes compression.
+app.add_middleware(
+    TracingMiddleware,
+    server_timing=os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true",
+)
+
 # Register routers
 app.include_router(routes_suggestion.router)
 app.include_router(routes_habit.router)
 app.include_router(routes_habit_plan.router)
+app.include_router(routes_metrics.router)
 
 # Mount static directory
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
@@ -0,0 +1,23 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.deadline import REQUEST_DEADLINE_HEADER, deadline_seconds, start_deadline
+
+
+class DeadlineMiddleware:
+    """
+    Give every HTTP request a deadline: REQUEST_DEADLINE_SECONDS, or the client's
+    REQUEST_DEADLINE_HEADER value (capped at REQUEST_DEADLINE_MAX_SECONDS).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header_value = Headers(scope=scope).get(REQUEST_DEADLINE_HEADER)
+        start_deadline(deadline_seconds(header_value))
+        await self.app(scope, receive, send)
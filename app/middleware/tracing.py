@@ -0,0 +1,71 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.tracing import RequestTrace, start_trace
+
+logger = logging.getLogger(__name__)
+
+
+def format_server_timing(trace: RequestTrace) -> str:
+    """Server-Timing header value, e.g. `db;dur=12.3;desc="x4", total;dur=250.1`."""
+    entries = []
+    for name, entry in trace.summary().items():
+        value = f"{name};dur={entry['ms']:.1f}"
+        if entry["count"] > 1:
+            value += f';desc="x{entry["count"]}"'
+        entries.append(value)
+    entries.append(f"total;dur={trace.elapsed_ms():.1f}")
+    return ", ".join(entries)
+
+
+class TracingMiddleware:
+    """
+    Start a trace for every HTTP request, expose the recorded spans in a Server-Timing
+    header and log one structured line per request once the response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = start_trace()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(raw=message["headers"])
+                    headers.append("Server-Timing", format_server_timing(trace))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration_ms = round(trace.elapsed_ms(), 1)
+            logger.info(
+                "%s %s %s %.1fms",
+                scope["method"],
+                scope["path"],
+                status_code,
+                duration_ms,
+                extra={
+                    "event": "request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": duration_ms,
+                    "spans": {
+                        name: {"ms": round(entry["ms"], 1), "count": entry["count"]}
+                        for name, entry in trace.summary().items()
+                    },
+                },
+            )
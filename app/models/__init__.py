@@ -6,3 +6,6 @@ from app.models.category import Category
 from app.models.habit_series import HabitSeries
 from app.models.habit_exception import HabitException
 from app.models.habit_plan import HabitPlan, HabitPlanSuggestion
+from app.models.habit_fingerprint import HabitFingerprint
+from app.models.suggestion_snapshot import SuggestionSnapshot
+from app.models.analysis_input import AnalysisInput
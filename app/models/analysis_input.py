@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from ..database import Base
+
+
+class AnalysisInput(Base):
+    """The last /suggestions/analyze payload of a user, replayed by the nightly job."""
+
+    __tablename__ = "analysis_inputs"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    payload = Column(Text, nullable=False)  # JSON HabitAnalysisInput, as received
+    received_at = Column(DateTime, nullable=False, index=True)
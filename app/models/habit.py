@@ -2,7 +2,7 @@ from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, E
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime, timezone
-from ..database import Base
+from ..database import Base, UUIDString
 from ..utils.id_generator import generate_uuid
 
 
@@ -20,12 +20,12 @@ class TrackingType(str, enum.Enum):
 class Habit(Base):
     __tablename__ = "habits"
 
-    id = Column(String, primary_key=True, index=True, default=generate_uuid)
+    id = Column(UUIDString, primary_key=True, index=True, default=generate_uuid)
     name = Column(String, nullable=False)
-    user_id = Column(String, ForeignKey("users.id"))
-    category_id = Column(String, ForeignKey("categories.id"))
+    user_id = Column(String, ForeignKey("users.id"), index=True)
+    category_id = Column(String, ForeignKey("categories.id"), index=True)
     date = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    habit_series_id = Column(String, nullable=True)
+    habit_series_id = Column(UUIDString, nullable=True)
     reminder_enabled = Column(Boolean, default=False, nullable=False)
     tracking_type = Column(
         Enum(TrackingType), default=TrackingType.COMPLETE, nullable=False
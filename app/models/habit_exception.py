@@ -1,16 +1,16 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Integer, ForeignKey
+from sqlalchemy import Column, DateTime, Boolean, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-from app.database import Base
+from app.database import Base, UUIDString
 from app.utils.id_generator import generate_uuid
 
 
 class HabitException(Base):
     __tablename__ = "habit_exceptions"
 
-    id = Column(String, primary_key=True, index=True, default=generate_uuid)
+    id = Column(UUIDString, primary_key=True, index=True, default=generate_uuid)
     habit_series_id = Column(
-        String, ForeignKey("habit_series.id"), nullable=False
+        UUIDString, ForeignKey("habit_series.id"), nullable=False
     )  # Link to HabitSeries
     date = Column(DateTime, nullable=False)  # Exception application date
     is_skipped = Column(
@@ -21,5 +21,10 @@ class HabitException(Base):
     current_value = Column(Integer, nullable=True)
     is_completed = Column(Boolean, nullable=True)
 
+    # Exceptions are always looked up per series, usually for a date range
+    __table_args__ = (
+        Index("ix_habit_exceptions_habit_series_id_date", "habit_series_id", "date"),
+    )
+
     # Relationships
     habit_series = relationship("HabitSeries", back_populates="habit_exceptions")
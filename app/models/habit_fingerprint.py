@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from ..database import Base
+
+
+class HabitFingerprint(Base):
+    """State of a habit's metrics at the user's last AI suggestion run."""
+
+    __tablename__ = "habit_fingerprints"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    # Habit IDs come from the analyze request and aren't necessarily in `habits`
+    habit_id = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    score = Column(Float)
+    updated_at = Column(DateTime, nullable=False)
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, String, Text, ForeignKey
 from sqlalchemy.orm import relationship
 from app.utils.id_generator import generate_uuid
-from ..database import Base
+from ..database import Base, UUIDString
 
 
 class HabitPlan(Base):
@@ -10,7 +10,9 @@ class HabitPlan(Base):
     id = Column(String, primary_key=True, index=True, default=generate_uuid)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
-    category_id = Column(String, ForeignKey("categories.id"), nullable=False)
+    category_id = Column(
+        String, ForeignKey("categories.id"), nullable=False, index=True
+    )
     image_path = Column(String, nullable=True)
 
     # Relationships
@@ -23,10 +25,10 @@ class HabitPlan(Base):
 class HabitPlanSuggestion(Base):
     __tablename__ = "habit_plan_suggestions"
 
-    id = Column(String, primary_key=True, index=True, default=generate_uuid)
+    id = Column(UUIDString, primary_key=True, index=True, default=generate_uuid)
     habit_plan_id = Column(
         String, ForeignKey("habit_plans.id"), nullable=False, index=True
     )
     suggestion_id = Column(
-        String, ForeignKey("suggestions.id"), nullable=False, index=True
+        UUIDString, ForeignKey("suggestions.id"), nullable=False, index=True
     )
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, String, DateTime, Enum, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-from app.database import Base
+from app.database import Base, UUIDString
 from app.models.habit import RepeatFrequency
 from app.utils.id_generator import generate_uuid
 
@@ -9,9 +9,9 @@ from app.utils.id_generator import generate_uuid
 class HabitSeries(Base):
     __tablename__ = "habit_series"
 
-    id = Column(String, primary_key=True, index=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    habit_id = Column(String, ForeignKey("habits.id"), nullable=False)
+    id = Column(UUIDString, primary_key=True, index=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    habit_id = Column(UUIDString, ForeignKey("habits.id"), nullable=False, index=True)
     start_date = Column(
         DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
     )
@@ -2,14 +2,14 @@ from sqlalchemy import Column, String, Float, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 
 from app.utils.id_generator import generate_uuid
-from ..database import Base
+from ..database import Base, UUIDString
 
 
 class PerformanceMetric(Base):
     __tablename__ = "performance_metrics"
 
-    id = Column(String, primary_key=True, index=True, default=generate_uuid)
-    habit_id = Column(String, ForeignKey("habits.id"), index=True)
+    id = Column(UUIDString, primary_key=True, index=True, default=generate_uuid)
+    habit_id = Column(UUIDString, ForeignKey("habits.id"), index=True)
     score = Column(Float)
     completion_rate = Column(Float)
     average_progress = Column(Float)
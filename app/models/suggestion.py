@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
-from ..database import Base
+from ..database import Base, UUIDString
 from ..utils.id_generator import generate_uuid
 from datetime import datetime
 
@@ -8,13 +8,18 @@ from datetime import datetime
 class Suggestion(Base):
     __tablename__ = "suggestions"
 
-    id = Column(String, primary_key=True, index=True, default=generate_uuid)
+    id = Column(UUIDString, primary_key=True, index=True, default=generate_uuid)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    habit_id = Column(String, ForeignKey("habits.id"), nullable=True)
+    habit_id = Column(UUIDString, ForeignKey("habits.id"), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.now)
 
+    # get_suggestion_by_user filters on user_id and orders by created_at
+    __table_args__ = (
+        Index("ix_suggestions_user_id_created_at", "user_id", "created_at"),
+    )
+
     # Relationships
     user = relationship("User", back_populates="suggestions")
     habit = relationship("Habit", back_populates="suggestions")
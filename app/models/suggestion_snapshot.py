@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from ..database import Base
+
+
+class SuggestionSnapshot(Base):
+    """The user's latest AI suggestions, ready to serve in a single primary-key read."""
+
+    __tablename__ = "suggestion_snapshots"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    # Hash of the habit fingerprints the suggestions were generated from
+    fingerprint = Column(String, nullable=False)
+    suggestions = Column(Text, nullable=False)  # JSON list of SuggestionResponse
+    source = Column(String, nullable=False)  # interactive / nightly
+    generated_at = Column(DateTime, nullable=False)
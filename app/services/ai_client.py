@@ -1,94 +1,504 @@
 import asyncio
+from abc import ABC, abstractmethod
 from concurrent.futures import ThreadPoolExecutor
-from typing import List
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Optional, Set, Union
 import json
+import logging
 import os
-import uuid
+import random
 import time
 from datetime import datetime
 import google.generativeai as genai
-from google.generativeai import GenerativeModel
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
 
 from app.schemas.habit_analysis_input_schema import HabitAnalysisInput
+from app.services.exception_summary import AI_PROMPT_SUMMARIZE_EXCEPTIONS, habit_for_prompt
+from app.services.habit_selector import AI_PROMPT_MAX_HABITS, select_habits_for_prompt
+from app.services.suggestion_output_schema import (
+    AI_STRUCTURED_OUTPUT,
+    fill_server_fields,
+    suggestion_list_schema,
+)
+from app.services.suggestion_selector import (
+    SUGGESTION_REFINE_MODE,
+    select_diverse_suggestions,
+)
 from app.schemas.suggestion_schema import SuggestionResponse
+from app.utils.deadline import time_left
+from app.utils.id_generator import generate_uuid
+from app.utils.logger import Payload
+from app.utils.metrics import (
+    AI_CHUNK_FAILURES,
+    AI_PARSE_FAILURES,
+    AI_REFINE_FAILURES,
+    AI_REQUEST_DURATION,
+    AI_REQUESTS,
+    AI_RETRIES,
+    record_ai_usage,
+)
+from app.utils.sample_suggestions import SAMPLE_SUGGESTIONS
+from app.utils.tracing import span
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL")
+
+# FakeAIBackend, a local stand-in for offline performance testing (AI_BACKEND=fake)
+FAKE_AI_LATENCY = float(os.getenv("FAKE_AI_LATENCY", "1.5"))  # seconds per call
+FAKE_AI_LATENCY_JITTER = float(os.getenv("FAKE_AI_LATENCY_JITTER", "0.5"))  # +/- seconds
+FAKE_AI_ERROR_RATE = float(os.getenv("FAKE_AI_ERROR_RATE", "0"))  # 0.0 - 1.0
+FAKE_AI_RATE_LIMIT_RATE = float(os.getenv("FAKE_AI_RATE_LIMIT_RATE", "0"))  # 0.0 - 1.0
+FAKE_AI_RETRY_AFTER = float(os.getenv("FAKE_AI_RETRY_AFTER", "5"))  # seconds
+FAKE_AI_SEED = os.getenv("FAKE_AI_SEED")  # set for reproducible runs
+# Share of free-text answers (no response schema) that come back cut off, 0.0 - 1.0
+FAKE_AI_MALFORMED_RATE = float(os.getenv("FAKE_AI_MALFORMED_RATE", "0"))
+# Generation time on top of FAKE_AI_LATENCY, per 1000 completion tokens
+FAKE_AI_SECONDS_PER_1K_TOKENS = float(os.getenv("FAKE_AI_SECONDS_PER_1K_TOKENS", "0"))
+# Pause between chunk requests to stay under the model's requests-per-minute limit
+AI_CHUNK_DELAY_SECONDS = float(os.getenv("AI_CHUNK_DELAY_SECONDS", "2"))
+# Failed AI calls are retried after a random delay of up to BASE * 2^attempt seconds
+# (capped at MAX), or after the retry-after a rate-limited backend asks for
+AI_RETRY_ATTEMPTS = int(os.getenv("AI_RETRY_ATTEMPTS", "3"))  # calls in total
+AI_RETRY_BASE_DELAY = float(os.getenv("AI_RETRY_BASE_DELAY", "1"))  # seconds
+AI_RETRY_MAX_DELAY = float(os.getenv("AI_RETRY_MAX_DELAY", "20"))  # seconds
+# Seconds of a request's deadline (app.utils.deadline) AI calls leave for the fallback
+AI_DEADLINE_RESERVE_SECONDS = float(os.getenv("AI_DEADLINE_RESERVE_SECONDS", "2"))
 genai.configure(api_key=GEMINI_API_KEY)
 
 executor = ThreadPoolExecutor()
 
+logger = logging.getLogger(__name__)
+
+
+class AIBackendError(Exception):
+    """The AI backend failed to produce a response."""
+
+
+class AIRateLimitError(AIBackendError):
+    """The AI backend rejected the call because of its rate limit."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds, when the backend says
+
+
+class AITimeoutError(AIBackendError):
+    """The request's deadline ran out before the AI backend answered."""
+
+
+@dataclass
+class AIResponse:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    backend: str = ""  # name of the backend that answered
+    fallback: bool = False  # answered by a fallback backend (canned, see AIRouter)
+
+
+@dataclass
+class AISuggestions:
+    suggestions: List[SuggestionResponse]
+    # A fallback backend answered at least one of the calls, so the suggestions are
+    # (partly) canned rather than generated for this user
+    fallback: bool = False
+
+
+class AIBackend(ABC):
+    """
+    Turns a prompt into generated text. `name` labels metrics and logs.
+    With a `response_schema` (OpenAPI subset, see suggestion_output_schema) the text is
+    JSON that follows it.
+    """
+
+    name: str = "unknown"
+    # True for backends that pass each call on to other backends (AIRouter), which
+    # measure those calls themselves
+    routes_calls: bool = False
+
+    @abstractmethod
+    async def generate(
+        self, prompt: str, response_schema: Optional[dict] = None
+    ) -> AIResponse:
+        """Text for the prompt; rate limits are raised as AIRateLimitError."""
+
+
+class GeminiBackend(AIBackend):
+    def __init__(self, model_name: str):
+        if not GEMINI_API_KEY:
+            raise ValueError("Missing GEMINI_API_KEY in environment variables.")
+        self.name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    async def generate(
+        self, prompt: str, response_schema: Optional[dict] = None
+    ) -> AIResponse:
+        generation_config = None
+        if response_schema is not None:
+            generation_config = genai.GenerationConfig(
+                response_mime_type="application/json", response_schema=response_schema
+            )
+        # Also end the HTTP call at the deadline, not only the wait for it
+        timeout = time_left(AI_DEADLINE_RESERVE_SECONDS)
+        loop = asyncio.get_event_loop()
+        try:
+            response = await loop.run_in_executor(
+                executor,
+                partial(
+                    self.model.generate_content,
+                    prompt,
+                    generation_config=generation_config,
+                    request_options={"timeout": timeout} if timeout else None,
+                ),
+            )
+        except google_exceptions.ResourceExhausted as e:
+            raise AIRateLimitError(str(e)) from e
+
+        usage = getattr(response, "usage_metadata", None)
+        return AIResponse(
+            text=response.text,
+            prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+            completion_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+        )
+
+
+class FakeAIBackend(AIBackend):
+    """
+    Local stand-in for Gemini: answers with suggestions from SAMPLE_SUGGESTIONS in the
+    format the prompts ask for, after a configurable delay, and fails or rate-limits a
+    configurable share of calls. No network, no API key.
+    With a response schema the answer is bare JSON restricted to the schema's fields,
+    without one it is a fenced JSON block, of which `malformed_rate` come back cut off.
+    """
 
-async def async_generate_content(prompt, model: GenerativeModel):
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, model.generate_content, prompt)
+    def __init__(
+        self,
+        latency: float = FAKE_AI_LATENCY,
+        latency_jitter: float = FAKE_AI_LATENCY_JITTER,
+        error_rate: float = FAKE_AI_ERROR_RATE,
+        rate_limit_rate: float = FAKE_AI_RATE_LIMIT_RATE,
+        retry_after: float = FAKE_AI_RETRY_AFTER,
+        suggestions_per_call: int = 5,
+        seed: Optional[int] = int(FAKE_AI_SEED) if FAKE_AI_SEED else None,
+        name: str = "fake",
+        malformed_rate: float = FAKE_AI_MALFORMED_RATE,
+        seconds_per_1k_tokens: float = FAKE_AI_SECONDS_PER_1K_TOKENS,
+    ):
+        self.name = name
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.suggestions_per_call = suggestions_per_call
+        self.malformed_rate = malformed_rate
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self._random = random.Random(seed)
+
+    async def generate(
+        self, prompt: str, response_schema: Optional[dict] = None
+    ) -> AIResponse:
+        roll = self._random.random()
+        malformed = self._random.random() < self.malformed_rate
+        delay = self.latency + self._random.uniform(
+            -self.latency_jitter, self.latency_jitter
+        )
+        sample = self._random.sample(
+            SAMPLE_SUGGESTIONS, min(self.suggestions_per_call, len(SAMPLE_SUGGESTIONS))
+        )
+
+        if roll < self.rate_limit_rate:
+            # Rate limits are answered right away, like the real API
+            raise AIRateLimitError("429 Resource exhausted (fake)", self.retry_after)
+
+        if response_schema is not None:
+            text = json.dumps(
+                [_conform(s, response_schema["items"]) for s in sample], indent=2
+            )
+        else:
+            text = "```json\n" + json.dumps(sample, indent=2) + "\n```"
+            if malformed:
+                text = text[: self._random.randrange(1, len(text) // 2)]
+        # Roughly 4 characters per token, like Gemini on English text
+        completion_tokens = len(text) // 4
+        delay += self.seconds_per_1k_tokens * completion_tokens / 1000
+
+        await asyncio.sleep(max(0.0, delay))
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise AIBackendError("500 Internal error (fake)")
+
+        return AIResponse(text, len(prompt) // 4, completion_tokens)
+
+
+def _conform(value, schema: dict):
+    """Keep only the fields `schema` declares, as constrained decoding would."""
+    if isinstance(value, dict) and "properties" in schema:
+        return {
+            key: _conform(item, schema["properties"][key])
+            for key, item in value.items()
+            if key in schema["properties"]
+        }
+    return value
+
+
+async def async_generate_content(
+    prompt: str, backend: AIBackend, response_schema: Optional[dict] = None
+) -> AIResponse:
+    if backend.routes_calls:
+        # Metrics and the deadline apply to the call to the backend it picks
+        return await backend.generate(prompt, response_schema)
+
+    timeout = time_left(AI_DEADLINE_RESERVE_SECONDS)
+    if timeout is not None and timeout <= 0:
+        AI_REQUESTS.labels(model=backend.name, outcome="timeout").inc()
+        raise AITimeoutError("Request deadline exceeded before the AI call")
+
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(
+            backend.generate(prompt, response_schema), timeout
+        )
+    except asyncio.TimeoutError as e:
+        AI_REQUESTS.labels(model=backend.name, outcome="timeout").inc()
+        raise AITimeoutError(f"{backend.name} did not answer within {timeout:.1f}s") from e
+    except AIRateLimitError:
+        AI_REQUESTS.labels(model=backend.name, outcome="rate_limited").inc()
+        raise
+    except Exception:
+        AI_REQUESTS.labels(model=backend.name, outcome="error").inc()
+        raise
+    finally:
+        AI_REQUEST_DURATION.labels(model=backend.name).observe(time.perf_counter() - start)
+    AI_REQUESTS.labels(model=backend.name, outcome="success").inc()
+    record_ai_usage(backend.name, response.prompt_tokens, response.completion_tokens)
+    response.backend = backend.name
+    return response
+
+
+async def generate_with_retry(
+    prompt: str,
+    backend: AIBackend,
+    response_schema: Optional[dict] = None,
+    attempts: int = AI_RETRY_ATTEMPTS,
+) -> AIResponse:
+    """
+    async_generate_content, retried with jittered exponential backoff. Rate-limited
+    calls wait for the backend's retry-after, or give up if that is over
+    AI_RETRY_MAX_DELAY. No retry is started that can't finish before the deadline.
+    A router already tries each of its backends per attempt; its fallback backends are
+    only tried on the last attempt, so retries go to the real backends.
+    """
+    for attempt in range(attempts):
+        last_attempt = attempt + 1 >= attempts
+        try:
+            if backend.routes_calls:
+                return await backend.generate(
+                    prompt, response_schema, use_fallbacks=last_attempt
+                )
+            return await async_generate_content(prompt, backend, response_schema)
+        except (ValueError, AITimeoutError):
+            raise  # misconfiguration (no backend registered) or out of time
+        except Exception as e:
+            delay = _retry_delay(attempt, e)
+            if last_attempt or delay is None:
+                raise
+            reason = "rate_limited" if isinstance(e, AIRateLimitError) else "error"
+            AI_RETRIES.labels(reason=reason).inc()
+            logger.warning(
+                "AI call failed (attempt %d of %d), retrying in %.1fs: %s",
+                attempt + 1,
+                attempts,
+                delay,
+                e,
+            )
+            with span("ai.retry_wait"):
+                await asyncio.sleep(delay)
 
 
 async def get_ai_suggestions(
     habitAnalysisInput: HabitAnalysisInput,
+    backend: AIBackend,
     chunk_size: int = 300,  # Average: 1,000,000 / 15 per minute ≈ 66,666 tokens per request
-) -> List[SuggestionResponse]:
+    habit_ids: Optional[Set[str]] = None,
+) -> AISuggestions:
     """
-    Calls Gemini AI to generate suggestions based on habits and metrics.
+    Calls the AI backend (usually the AIRouter from ai_router) to generate
+    suggestions based on habits and metrics.
     Splits the habits list into chunks to avoid exceeding token limits.
-    Then consolidates the suggestions into top 3-5.
+    Then consolidates the suggestions into top 3-5 (see SUGGESTION_REFINE_MODE).
+    habit_ids limits the habits sent to these (e.g. the ones changed since last time).
+    Calls are retried (generate_with_retry); a chunk that still fails is left out,
+    and only if every chunk fails is the error raised.
+    The result says whether a fallback backend answered any call.
     """
-    if not GEMINI_API_KEY:
-        raise ValueError("Missing GEMINI_API_KEY in environment variables.")
-
+    fallback = False
     all_suggestions = []
-    model = genai.GenerativeModel(GEMINI_MODEL)
     habits = habitAnalysisInput.habits
+    response_schema = suggestion_list_schema() if AI_STRUCTURED_OUTPUT else None
 
     # Handle the case when there are no habits
     if len(habits) == 0:
         # Call API with empty habits list to get starter suggestions
-        prompt = _create_suggestion_prompt(habitAnalysisInput, 0, chunk_size)
-        response = await async_generate_content(prompt, model)
-        suggestions = _parse_ai_response(response.text)
-        return suggestions
+        with span("ai.prompt"):
+            prompt = _create_suggestion_prompt(habitAnalysisInput, 0, chunk_size)
+        with span("ai.generate"):
+            response = await generate_with_retry(prompt, backend, response_schema)
+        with span("ai.parse"):
+            suggestions = _parse_ai_response(response.text)
+        return AISuggestions(suggestions, response.fallback)
+
+    # Only the habits most worth improving plus a profile of all of them, in one prompt
+    if AI_PROMPT_MAX_HABITS > 0:
+        with span("ai.select"):
+            selected, profile = select_habits_for_prompt(
+                habitAnalysisInput, candidate_ids=habit_ids
+            )
+            selected_input = habitAnalysisInput.model_copy(update={"habits": selected})
+        with span("ai.prompt"):
+            prompt = _create_suggestion_prompt(
+                selected_input, 0, len(selected), profile=profile
+            )
+        with span("ai.generate"):
+            response = await generate_with_retry(prompt, backend, response_schema)
+        with span("ai.parse"):
+            suggestions = _parse_ai_response(response.text)
+        with span("ai.select_suggestions"):
+            selected_suggestions = select_diverse_suggestions(suggestions, habits)
+        return AISuggestions(selected_suggestions, response.fallback)
+
+    # AI_PROMPT_MAX_HABITS=0: send every habit, chunked
+    if habit_ids is not None:
+        habits = [h for h in habits if h.id in habit_ids]
+        habitAnalysisInput = habitAnalysisInput.model_copy(update={"habits": habits})
 
-    # If there are habits, proceed with normal chunking logic
     # 1. Handle chunk splitting
+    chunk_results = []
     for i in range(0, len(habits), chunk_size):
-        prompt = _create_suggestion_prompt(habitAnalysisInput, i, chunk_size)
+        remaining = time_left(AI_DEADLINE_RESERVE_SECONDS)
+        if remaining is not None and remaining <= 0:
+            logger.warning("Request deadline reached, skipping AI chunks from %d", i)
+            chunk_results.append(AITimeoutError("Request deadline exceeded"))
+            break
+        with span("ai.prompt"):
+            prompt = _create_suggestion_prompt(habitAnalysisInput, i, chunk_size)
 
         # Await for the asynchronous function
-        response = await async_generate_content(prompt, model)
-
-        chunk_suggestions = _parse_ai_response(response.text)
-        all_suggestions.extend(chunk_suggestions)
-
-        print(f"Processing habit chunks: {i} - {i + chunk_size}")
-        time.sleep(2)
-
-    # 2. Refine suggestions in chunks if the list is too big
-    if len(all_suggestions) > 5:
+        try:
+            with span("ai.generate"):
+                response = await generate_with_retry(prompt, backend, response_schema)
+        except Exception as e:
+            logger.warning("AI chunk %d - %d failed: %s", i, i + chunk_size, e)
+            chunk_results.append(e)
+        else:
+            fallback = fallback or response.fallback
+            with span("ai.parse"):
+                chunk_results.append(_parse_ai_response(response.text))
+
+        logger.debug("Processing habit chunks: %d - %d", i, i + chunk_size)
+        with span("ai.throttle"):
+            await asyncio.sleep(_within_deadline(AI_CHUNK_DELAY_SECONDS))
+    all_suggestions = _assemble_chunk_results(chunk_results)
+
+    # 2. Refine suggestions if the list is too big: locally, or in chunks with the AI
+    if len(all_suggestions) > 5 and SUGGESTION_REFINE_MODE != "ai":
+        with span("ai.select_suggestions"):
+            final_suggestions = select_diverse_suggestions(all_suggestions, habits)
+    elif len(all_suggestions) > 5:
         final_suggestions = []
-        model1 = genai.GenerativeModel(GEMINI_MODEL)
         for i in range(0, len(all_suggestions), chunk_size):
             chunk_suggestions = all_suggestions[i : i + chunk_size]
             # Await for the asynchronous function
-            prompt = _refine_suggestions_prompt(chunk_suggestions)
-            response = await async_generate_content(prompt, model1)
-            refined_chunk = _parse_ai_response(response.text)
+            with span("ai.refine"):
+                prompt = _refine_suggestions_prompt(chunk_suggestions)
+                try:
+                    response = await generate_with_retry(prompt, backend, response_schema)
+                    fallback = fallback or response.fallback
+                    refined_chunk = _parse_ai_response(response.text)
+                except Exception as e:
+                    # The chunk's suggestions are already paid for, pick from them locally
+                    logger.warning("AI refine round failed, selecting locally: %s", e)
+                    AI_REFINE_FAILURES.inc()
+                    refined_chunk = select_diverse_suggestions(chunk_suggestions, habits)
             final_suggestions.extend(refined_chunk)
-            print(f"Processing suggestion chunks: {i} - {i + chunk_size}")
-            time.sleep(2)
+            logger.debug("Processing suggestion chunks: %d - %d", i, i + chunk_size)
+            with span("ai.throttle"):
+                await asyncio.sleep(_within_deadline(AI_CHUNK_DELAY_SECONDS))
 
     else:
         final_suggestions = all_suggestions
 
-    return final_suggestions
+    return AISuggestions(final_suggestions, fallback)
+
+
+def _retry_delay(attempt: int, error: Exception) -> Optional[float]:
+    """Seconds to wait before the next attempt, None if not worth retrying."""
+    if isinstance(error, google_exceptions.ClientError):
+        return None  # the same request would be rejected again
+    if isinstance(error, AIRateLimitError) and error.retry_after is not None:
+        if error.retry_after > AI_RETRY_MAX_DELAY:
+            return None
+        # A little jitter so the waiting calls don't all come back at once
+        delay = error.retry_after + random.uniform(0, AI_RETRY_BASE_DELAY)
+    else:
+        # "Full jitter": anywhere between 0 and the exponential backoff
+        delay = random.uniform(
+            0, min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * 2**attempt)
+        )
+    remaining = time_left(AI_DEADLINE_RESERVE_SECONDS)
+    if remaining is not None and delay >= remaining:
+        return None  # the retry would start after the deadline
+    return delay
+
+
+def _within_deadline(seconds: float) -> float:
+    """`seconds`, shortened to the time left before the request's deadline."""
+    remaining = time_left(AI_DEADLINE_RESERVE_SECONDS)
+    return seconds if remaining is None else min(seconds, remaining)
+
+
+def _assemble_chunk_results(
+    chunk_results: List[Union[List[SuggestionResponse], Exception]],
+) -> List[SuggestionResponse]:
+    """
+    Suggestions of the chunks that succeeded, in chunk order. Raises the last error
+    when no chunk did, so the caller falls back as before.
+    """
+    errors = [r for r in chunk_results if isinstance(r, Exception)]
+    if errors and len(errors) == len(chunk_results):
+        raise errors[-1]
+    if errors:
+        AI_CHUNK_FAILURES.inc(len(errors))
+        logger.warning(
+            "Using suggestions from %d of %d AI chunks",
+            len(chunk_results) - len(errors),
+            len(chunk_results),
+        )
+    return [s for r in chunk_results if not isinstance(r, Exception) for s in r]
+
+
+# With a response schema the model gets the field names and types from the schema and
+# the ids are assigned after parsing, so the prompts only explain what goes where
+_SUGGESTION_OUTPUT_NOTE = """### Output format:
+        Return the suggestions as a JSON array.
+        - For existing habit improvements, use the actual habit id and details from the user data.
+        - For new habits, leave the habit id empty.
+        """
+_REFINE_OUTPUT_NOTE = """### Output format:
+        Return the selected suggestions as a JSON array, keeping the habit id and every
+        field of the `habit` objects exactly as they are.
+        """
 
 
 def _create_suggestion_prompt(
     habitAnalysisInput: HabitAnalysisInput,
     i: int,
     chunk_size: int,
+    profile: Optional[dict] = None,
+    summarize_exceptions: bool = AI_PROMPT_SUMMARIZE_EXCEPTIONS,
+    structured_output: bool = AI_STRUCTURED_OUTPUT,
 ) -> str:
     chunk_habits = habitAnalysisInput.habits[i : i + chunk_size]
     has_habits = len(chunk_habits) > 0
@@ -128,6 +538,86 @@ The 5 new habit suggestions should:
         else ""
     )
 
+    exceptions_field_block = (
+        """- **exception_summary** (object, optional): Aggregates of the days the user logged for this habit (skipped, completed or with a recorded value):
+            + **logged_days**, **skipped_days**, **completed_days** (integer): Number of logged days of each kind.
+            + **skip_rate_by_weekday** (object): Share of the logged days that were skipped, per weekday ("mon" - "sun").
+            + **recent_week_trend** (object): Completion rate of the last 7 days vs the 7 days before (0.0 - 1.0) and the direction ("improving", "declining", "stable" or "unknown").
+            + **longest_gap_days** (integer): Most consecutive days without completing the habit.
+            + **last_values** (list): The last logged days, with date, whether skipped or completed, and the recorded value for progress-based habits."""
+        if summarize_exceptions
+        else """- **exceptions** (list[HabitExceptionBase], optional):  
+        A list of exceptions affecting this habit. Exceptions can indicate skipped days, modified tracking values, or changes in reminders.  
+        Each exception has the following fields:  
+            + **habit_series_id** (string): Identifier linking this exception to a recurring habit series.  
+            + **date** (ISO string): The specific date of the exception.  
+            + **is_skipped** (boolean, default=False): Whether the habit was skipped on this date.  
+            + **reminder_enabled** (boolean, default=False): Whether reminders were active on this date.  
+            + **target_value** (integer, optional): Updated target value for progress-based habits on this date.  
+            + **current_value** (integer, optional): The recorded value for progress-based habits on this date.  
+            + **is_completed** (boolean, optional): Whether the habit was completed on this date."""
+    )
+
+    profile_block = (
+        f"""
+        ### Profile of all the user's habits:
+        The habits above were pre-selected as the ones most worth improving (low score, recent decline). This is an overview of all {profile["total_habits"]} habits, use it to find gaps for new habits:
+        {json.dumps(profile)}
+"""
+        if profile
+        else ""
+    )
+
+    if structured_output:
+        output_format_block = _SUGGESTION_OUTPUT_NOTE
+    else:
+        output_format_block = """### Output format:
+        Return suggestions in JSON format like this example:
+        [
+            {
+                "id": "suggestion-550e8400-e29b-41d4-a716-446655440000", // String: Unique IDs in the format "suggestion-uuid4()"
+                "userId": "user_1",             // String: ID of the user
+                "title": "Stay Hydrated Regularly", // Motivating and clear title
+                "description": "Try setting reminders to drink water every 2 hours. You can place a water bottle on your desk as a visual cue.", // String: A concise action-oriented suggestion, followed by an explanation or two of why this action is useful or beneficial.
+                "habit": {
+                    "id": "habit-550e8400-e29b-41d4-a716-446655440000",        // String: Unique IDs in the format "habit-uuid4()"
+                    "name": "Drink Water",          // String: Name of the habit
+                    "userId": "user_1",             // String: ID of the user
+                    "category": {                  // The category field *must* strictly be one of the following values, matching the user\'s habit or context: "health", "work", "personal_growth", "hobby", "fitness", "education", "finance", "social", "spiritual"
+                        "id": "health",             // ID of the category
+                        "name": "Health",           // Name of the category
+                        "iconPath": "assets/icons/health.png", // Path to the category icon
+                        "colorHex": "#FF5733"       // Hexadecimal color code for the category
+                    },
+                    "date": "2024-03-01T00:00:00Z", // DateTime: creation date (matches startDate in series)
+                    "series": {                    // HabitSeries object (nullable)
+                        "id": "series-550e8400-e29b-41d4-a716-446655440000",         // String: Unique IDs in the format "habit-uuid4()"
+                        "userId": "user_1",         // String: User ID
+                        "habitId": "habit-550e8400-e29b-41d4-a716-446655440000", // String: Link to original habit
+                        "startDate": "2024-03-01T00:00:00Z", // DateTime: Start date of series
+                        "untilDate": "2024-06-01T00:00:00Z", // DateTime: End date (nullable)
+                        "repeatFrequency": "daily"  // RepeatFrequency enum value
+                    },
+                    "reminderEnabled": true,        // Boolean: whether reminders are enabled
+                    "trackingType": "complete",     // TrackingType enum value (complete, progress)
+                    "targetValue": 8,               // Integer: target value (nullable)
+                    "currentValue": 3,              // Integer: current progress value (nullable)
+                    "unit": "cups",                 // String: unit of measurement (nullable)
+                    "isCompleted": false            // Boolean: completion status (nullable)
+                },
+            },
+            // ... more suggestions
+        ]
+
+        IMPORTANT: 
+        1. For existing habit improvements, use the actual habit ID and details from the user data.
+        2. For new habits, create new unique IDs in the format "habit-uuid4()". 
+            For example: "habit-550e8400-e29b-41d4-a716-446655440000"
+        3. For new series, create new unique IDs in the format "series-uuid4()".
+            For example: "series-550e8400-e29b-41d4-a716-446655440000"
+        4. The category field *must* strictly be one of the following values: "health", "work", "personal_growth", "hobby", "fitness", "education", "finance", "social", "spiritual"
+        """
+
     prompt = f"""
         You are an expert AI habit coach. Your task is to analyze the user's current habits and performance metrics, then generate personalized, actionable suggestions to help them improve their habits.
 
@@ -137,7 +627,8 @@ The 5 new habit suggestions should:
 
         ### Data:
         Here is the user's current habit data and performance metrics in JSON format:
-        {json.dumps([habit.model_dump() for habit in chunk_habits], indent=2, default=convert_datetime)}
+        {json.dumps([habit_for_prompt(habit, habitAnalysisInput.end_date, summarize_exceptions) for habit in chunk_habits], indent=2, default=convert_datetime)}
+        {profile_block}
 
         Each item in the list has the following fields:
         - **id** (string): Unique identifier for the habit.
@@ -157,16 +648,7 @@ The 5 new habit suggestions should:
         - **start_date** (ISO string): The date when the habit was first created.
         - **until_date** (ISO string, optional): The date when the habit tracking should end (if applicable).
         
-        - **exceptions** (list[HabitExceptionBase], optional):  
-        A list of exceptions affecting this habit. Exceptions can indicate skipped days, modified tracking values, or changes in reminders.  
-        Each exception has the following fields:  
-            + **habit_series_id** (string): Identifier linking this exception to a recurring habit series.  
-            + **date** (ISO string): The specific date of the exception.  
-            + **is_skipped** (boolean, default=False): Whether the habit was skipped on this date.  
-            + **reminder_enabled** (boolean, default=False): Whether reminders were active on this date.  
-            + **target_value** (integer, optional): Updated target value for progress-based habits on this date.  
-            + **current_value** (integer, optional): The recorded value for progress-based habits on this date.  
-            + **is_completed** (boolean, optional): Whether the habit was completed on this date.
+        {exceptions_field_block}
         
         - **performance_metric: Performance Metrics:**
             + **completion_rate** (float, optional): Percentage of time the habit was completed (0.0 - 1.0).
@@ -207,51 +689,7 @@ The 5 new habit suggestions should:
         - Each suggestion must have a **clear benefit** and be **easy to understand**.
         - Be specific about timing, frequency, and implementation.
 
-        ### Output format:
-        Return suggestions in JSON format like this example:
-        [
-            {{
-                "id": "suggestion-550e8400-e29b-41d4-a716-446655440000", // String: Unique IDs in the format "suggestion-uuid4()"
-                "userId": "user_1",             // String: ID of the user
-                "title": "Stay Hydrated Regularly", // Motivating and clear title
-                "description": "Try setting reminders to drink water every 2 hours. You can place a water bottle on your desk as a visual cue.", // String: A concise action-oriented suggestion, followed by an explanation or two of why this action is useful or beneficial.
-                "habit": {{
-                    "id": "habit-550e8400-e29b-41d4-a716-446655440000",        // String: Unique IDs in the format "habit-uuid4()"
-                    "name": "Drink Water",          // String: Name of the habit
-                    "userId": "user_1",             // String: ID of the user
-                    "category": {{                  // The category field *must* strictly be one of the following values, matching the user\'s habit or context: "health", "work", "personal_growth", "hobby", "fitness", "education", "finance", "social", "spiritual"
-                        "id": "health",             // ID of the category
-                        "name": "Health",           // Name of the category
-                        "iconPath": "assets/icons/health.png", // Path to the category icon
-                        "colorHex": "#FF5733"       // Hexadecimal color code for the category
-                    }},
-                    "date": "2024-03-01T00:00:00Z", // DateTime: creation date (matches startDate in series)
-                    "series": {{                    // HabitSeries object (nullable)
-                        "id": "series-550e8400-e29b-41d4-a716-446655440000",         // String: Unique IDs in the format "habit-uuid4()"
-                        "userId": "user_1",         // String: User ID
-                        "habitId": "habit-550e8400-e29b-41d4-a716-446655440000", // String: Link to original habit
-                        "startDate": "2024-03-01T00:00:00Z", // DateTime: Start date of series
-                        "untilDate": "2024-06-01T00:00:00Z", // DateTime: End date (nullable)
-                        "repeatFrequency": "daily"  // RepeatFrequency enum value
-                    }},
-                    "reminderEnabled": true,        // Boolean: whether reminders are enabled
-                    "trackingType": "complete",     // TrackingType enum value (complete, progress)
-                    "targetValue": 8,               // Integer: target value (nullable)
-                    "currentValue": 3,              // Integer: current progress value (nullable)
-                    "unit": "cups",                 // String: unit of measurement (nullable)
-                    "isCompleted": false            // Boolean: completion status (nullable)
-                }},
-            }},
-            // ... more suggestions
-        ]
-
-        IMPORTANT: 
-        1. For existing habit improvements, use the actual habit ID and details from the user data.
-        2. For new habits, create new unique IDs in the format "habit-uuid4()". 
-            For example: "habit-550e8400-e29b-41d4-a716-446655440000"
-        3. For new series, create new unique IDs in the format "series-uuid4()".
-            For example: "series-550e8400-e29b-41d4-a716-446655440000"
-        4. The category field *must* strictly be one of the following values: "health", "work", "personal_growth", "hobby", "fitness", "education", "finance", "social", "spiritual"
+        {output_format_block}
         """
     return prompt
 
@@ -269,8 +707,10 @@ def _parse_ai_response(response_text: str) -> List[SuggestionResponse]:
 
         suggestions = []
         for item in suggestions_data:
+            # Left out of the response schema (AI_STRUCTURED_OUTPUT)
+            item = fill_server_fields(item)
             suggestion = SuggestionResponse(
-                id=str(uuid.uuid4()),
+                id=generate_uuid(),
                 user_id="",  # Set later in the service
                 icon=item.get("icon", "💡"),
                 title=item.get("title", "Habit Suggestion"),
@@ -283,11 +723,15 @@ def _parse_ai_response(response_text: str) -> List[SuggestionResponse]:
         return suggestions
 
     except json.JSONDecodeError:
+        AI_PARSE_FAILURES.inc()
+        logger.warning("Could not parse AI response: %s", Payload(response_text))
         return []
 
 
 def _refine_suggestions_prompt(
-    suggestions: List[SuggestionResponse], top_n: int = 5
+    suggestions: List[SuggestionResponse],
+    top_n: int = 5,
+    structured_output: bool = AI_STRUCTURED_OUTPUT,
 ) -> str:
     """
     Sends a final prompt to Gemini to consolidate and refine suggestions into top N.
@@ -295,64 +739,48 @@ def _refine_suggestions_prompt(
     # Convert SuggestionResponse objects to dict
     suggestions_dicts = [s.model_dump(by_alias=True) for s in suggestions]
 
-    print(
-        "Refining suggestions...",
-        {json.dumps(suggestions_dicts, indent=2, default=str)},
-    )
-
-    prompt = f"""
-        You are an expert AI habit coach. Below is a list of habit suggestions already generated.
-
-        ### Suggestions List:
-        {json.dumps(suggestions_dicts, indent=2, default=str)}
-
-        ### Task:
-        - From the provided list, select the **top {top_n} suggestions**.
-        - Prioritize **diversity** (different categories) and **impactfulness**.
-        - Make sure they are **actionable** and **clear**.
-
-        ### VERY IMPORTANT:
-        - DO NOT remove or nullify any fields.
-        - KEEP every field in the original suggestion objects exactly as they are, including:
-            - `habit` (even if it contains nested objects)
+    logger.debug("Refining suggestions: %s", Payload(suggestions_dicts))
 
-        ### Output format:
+    if structured_output:
+        output_format_block = _REFINE_OUTPUT_NOTE
+    else:
+        output_format_block = """### Output format:
         Return ONLY a **JSON array** of full suggestion objects, **without changing any field names**.  
         Keep the field `habit` as it is, and do not replace it with anything else.
         For example:
         [
-            {{
+            {
                 "id": "suggestion-550e8400-e29b-41d4-a716-446655440000", // String: Unique IDs in the format "suggestion-uuid4()"
                 "userId": "user_1",             // String: ID of the user
                 "title": "Stay Hydrated Regularly", // Motivating and clear title
                 "description": "Try setting reminders to drink water every 2 hours. You can place a water bottle on your desk as a visual cue.", // String: A concise action-oriented suggestion, followed by an explanation or two of why this action is useful or beneficial.
-                "habit": {{
+                "habit": {
                     "id": "habit-550e8400-e29b-41d4-a716-446655440000",        // String: Unique IDs in the format "habit-uuid4()"
                     "name": "Drink Water",          // String: Name of the habit
                     "userId": "user_1",             // String: ID of the user
-                    "category": {{                  // The category field *must* strictly be one of the following values, matching the user\'s habit or context: "health", "work", "personal_growth", "hobby", "fitness", "education", "finance", "social", "spiritual"
+                    "category": {                  // The category field *must* strictly be one of the following values, matching the user\'s habit or context: "health", "work", "personal_growth", "hobby", "fitness", "education", "finance", "social", "spiritual"
                         "id": "health",             // ID of the category
                         "name": "Health",           // Name of the category
                         "iconPath": "assets/icons/health.png", // Path to the category icon
                         "colorHex": "#FF5733"       // Hexadecimal color code for the category
-                    }},
+                    },
                     "date": "2024-03-01T00:00:00Z", // DateTime: creation date (matches startDate in series)
-                    "series": {{                    // HabitSeries object (nullable)
+                    "series": {                    // HabitSeries object (nullable)
                         "id": "series-550e8400-e29b-41d4-a716-446655440000",         // String: Unique IDs in the format "habit-uuid4()"
                         "userId": "user_1",         // String: User ID
                         "habitId": "habit-550e8400-e29b-41d4-a716-446655440000", // String: Link to original habit
                         "startDate": "2024-03-01T00:00:00Z", // DateTime: Start date of series
                         "untilDate": "2024-06-01T00:00:00Z", // DateTime: End date (nullable)
                         "repeatFrequency": "daily"  // RepeatFrequency enum value
-                    }},
+                    },
                     "reminderEnabled": true,        // Boolean: whether reminders are enabled
                     "trackingType": "complete",     // TrackingType enum value (complete, progress)
                     "targetValue": 8,               // Integer: target value (nullable)
                     "currentValue": 3,              // Integer: current progress value (nullable)
                     "unit": "cups",                 // String: unit of measurement (nullable)
                     "isCompleted": false            // Boolean: completion status (nullable)
-                }},
-            }},
+                },
+            },
             // ... more suggestions
         ]
 
@@ -365,4 +793,23 @@ def _refine_suggestions_prompt(
         4. The category field *must* strictly be one of the following values: "health", "work", "personal_growth", "hobby", "fitness", "education", "finance", "social", "spiritual"
         """
 
+    prompt = f"""
+        You are an expert AI habit coach. Below is a list of habit suggestions already generated.
+
+        ### Suggestions List:
+        {json.dumps(suggestions_dicts, indent=2, default=str)}
+
+        ### Task:
+        - From the provided list, select the **top {top_n} suggestions**.
+        - Prioritize **diversity** (different categories) and **impactfulness**.
+        - Make sure they are **actionable** and **clear**.
+
+        ### VERY IMPORTANT:
+        - DO NOT remove or nullify any fields.
+        - KEEP every field in the original suggestion objects exactly as they are, including:
+            - `habit` (even if it contains nested objects)
+
+        {output_format_block}
+        """
+
     return prompt
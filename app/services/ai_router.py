@@ -0,0 +1,244 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.services.ai_client import (
+    AI_DEADLINE_RESERVE_SECONDS,
+    GEMINI_MODEL,
+    AIBackend,
+    AIRateLimitError,
+    AIResponse,
+    AITimeoutError,
+    FakeAIBackend,
+    GeminiBackend,
+    async_generate_content,
+)
+from app.utils.deadline import time_left
+
+logger = logging.getLogger(__name__)
+
+# Backends to route between, comma-separated, in order of preference for a cold start:
+#   gemini - one backend per model in GEMINI_MODELS
+#   fake   - local stand-in (FAKE_AI_* settings in ai_client)
+#   sample - answers from the sample suggestions, only used when every other backend
+#            is failing or rate-limited
+AI_BACKEND = os.getenv("AI_BACKEND", "gemini").lower()
+GEMINI_MODELS = [
+    m.strip() for m in os.getenv("GEMINI_MODELS", GEMINI_MODEL or "").split(",") if m.strip()
+]
+# USD per 1M prompt tokens, e.g. "gemini-2.0-flash:0.10,gemini-2.0-flash-lite:0.075"
+AI_MODEL_COSTS = {
+    name.strip(): float(cost)
+    for name, _, cost in (
+        item.partition(":") for item in os.getenv("AI_MODEL_COSTS", "").split(",") if item
+    )
+}
+
+AI_ROUTER_WINDOW = int(os.getenv("AI_ROUTER_WINDOW", "50"))  # recent calls per backend
+AI_ROUTER_MIN_SAMPLES = int(os.getenv("AI_ROUTER_MIN_SAMPLES", "5"))
+AI_ROUTER_MAX_ERROR_RATE = float(os.getenv("AI_ROUTER_MAX_ERROR_RATE", "0.5"))
+# Seconds before an unhealthy backend gets another try
+AI_ROUTER_PROBE_INTERVAL = float(os.getenv("AI_ROUTER_PROBE_INTERVAL", "30"))
+# Score = p95 latency (s) + ERROR_PENALTY * error rate + COST_WEIGHT * cost; lowest wins
+AI_ROUTER_ERROR_PENALTY = float(os.getenv("AI_ROUTER_ERROR_PENALTY", "10"))
+AI_ROUTER_COST_WEIGHT = float(os.getenv("AI_ROUTER_COST_WEIGHT", "1"))
+AI_ROUTER_RATE_LIMIT_COOLDOWN = 30.0  # seconds, when the backend doesn't say
+
+
+class BackendStats:
+    """Latency and outcome of the last `window` calls to a backend."""
+
+    def __init__(self, window: int = AI_ROUTER_WINDOW):
+        self.calls = deque(maxlen=window)  # (latency in seconds, succeeded)
+        self.cooldown_until = 0.0
+        self.last_attempt = 0.0
+
+    def record(self, latency: float, succeeded: bool) -> None:
+        self.calls.append((latency, succeeded))
+
+    def p95(self) -> Optional[float]:
+        latencies = sorted(latency for latency, succeeded in self.calls if succeeded)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def error_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, succeeded in self.calls if not succeeded) / len(self.calls)
+
+
+class RegisteredBackend:
+    def __init__(self, backend: AIBackend, cost: float, fallback: bool):
+        self.backend = backend
+        self.cost = cost
+        self.fallback = fallback
+        self.stats = BackendStats()
+
+    def is_healthy(self, now: float) -> bool:
+        if now < self.stats.cooldown_until:
+            return False
+        if (
+            len(self.stats.calls) >= AI_ROUTER_MIN_SAMPLES
+            and self.stats.error_rate() > AI_ROUTER_MAX_ERROR_RATE
+        ):
+            # Let one call through now and then to notice the recovery
+            return now - self.stats.last_attempt >= AI_ROUTER_PROBE_INTERVAL
+        return True
+
+    def score(self) -> float:
+        # Backends without successful calls yet score 0 latency, so they get tried
+        p95 = self.stats.p95() or 0.0
+        return (
+            p95
+            + AI_ROUTER_ERROR_PENALTY * self.stats.error_rate()
+            + AI_ROUTER_COST_WEIGHT * self.cost
+        )
+
+
+class AIRouter(AIBackend):
+    """
+    Sends each call to the best registered backend: lowest score among the healthy ones
+    (see AI_ROUTER_* settings), then fallback backends, then unhealthy ones as a last
+    resort. A failed call is retried on the next backend in that order; with
+    use_fallbacks=False the fallback backends are left out (unless there is nothing else).
+    """
+
+    name = "router"
+    routes_calls = True
+
+    def __init__(self):
+        self._backends: List[RegisteredBackend] = []
+
+    def register(self, backend: AIBackend, cost: float = 0.0, fallback: bool = False) -> None:
+        self._backends.append(RegisteredBackend(backend, cost, fallback))
+
+    @property
+    def backends(self) -> List[AIBackend]:
+        return [registered.backend for registered in self._backends]
+
+    def ranked(self) -> List[RegisteredBackend]:
+        now = time.monotonic()
+        healthy, fallbacks, unhealthy = [], [], []
+        for registered in self._backends:
+            if registered.fallback:
+                fallbacks.append(registered)
+            elif registered.is_healthy(now):
+                healthy.append(registered)
+            else:
+                unhealthy.append(registered)
+        # sorted() is stable: equal scores keep the registration order
+        return (
+            sorted(healthy, key=RegisteredBackend.score)
+            + fallbacks
+            + sorted(unhealthy, key=RegisteredBackend.score)
+        )
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            registered.backend.name: {
+                "p95": registered.stats.p95(),
+                "error_rate": registered.stats.error_rate(),
+                "calls": len(registered.stats.calls),
+                "cost": registered.cost,
+                "fallback": registered.fallback,
+            }
+            for registered in self._backends
+        }
+
+    async def generate(
+        self,
+        prompt: str,
+        response_schema: Optional[dict] = None,
+        use_fallbacks: bool = True,
+    ) -> AIResponse:
+        if not self._backends:
+            raise ValueError("No AI backend registered, check AI_BACKEND.")
+
+        ranked = self.ranked()
+        if not use_fallbacks:
+            ranked = [r for r in ranked if not r.fallback] or ranked
+
+        last_error: Optional[Exception] = None
+        for registered in ranked:
+            remaining = time_left(AI_DEADLINE_RESERVE_SECONDS)
+            if remaining is not None and remaining <= 0:
+                # Not the next backend's fault, don't count it against its stats
+                last_error = last_error or AITimeoutError("Request deadline exceeded")
+                break
+            backend, stats = registered.backend, registered.stats
+            stats.last_attempt = time.monotonic()
+            start = time.perf_counter()
+            try:
+                response = await async_generate_content(prompt, backend, response_schema)
+            except AIRateLimitError as e:
+                stats.record(time.perf_counter() - start, False)
+                stats.cooldown_until = time.monotonic() + (
+                    e.retry_after or AI_ROUTER_RATE_LIMIT_COOLDOWN
+                )
+                logger.warning("AI backend %s rate-limited: %s", backend.name, e)
+                last_error = e
+                continue
+            except Exception as e:
+                stats.record(time.perf_counter() - start, False)
+                logger.warning("AI backend %s failed: %s", backend.name, e)
+                last_error = e
+                continue
+
+            stats.record(time.perf_counter() - start, True)
+            logger.debug("AI call served by %s", backend.name)
+            response.fallback = registered.fallback
+            return response
+
+        raise last_error
+
+
+def build_ai_router(backend_names: str = AI_BACKEND) -> AIRouter:
+    """Register the backends listed in AI_BACKEND."""
+    router = AIRouter()
+    for name in (n.strip() for n in backend_names.split(",")):
+        if name == "gemini":
+            for model in GEMINI_MODELS:
+                router.register(GeminiBackend(model), cost=AI_MODEL_COSTS.get(model, 0.0))
+        elif name == "fake":
+            router.register(FakeAIBackend())
+        elif name == "sample":
+            router.register(
+                # Always answers: none of the FAKE_AI_* failure settings apply
+                FakeAIBackend(
+                    latency=0.0,
+                    latency_jitter=0.0,
+                    error_rate=0.0,
+                    rate_limit_rate=0.0,
+                    malformed_rate=0.0,
+                    seconds_per_1k_tokens=0.0,
+                    name="sample",
+                ),
+                fallback=True,
+            )
+        elif name:
+            raise ValueError(f"Unknown AI backend: {name}")
+    return router
+
+
+_router: Optional[AIRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_ai_router() -> AIRouter:
+    """The router for the AI_BACKEND setting, created on first use."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = build_ai_router()
+        return _router
+
+
+def set_ai_router(router: Optional[AIRouter]) -> None:
+    """Replace the router (benchmarks); None goes back to the AI_BACKEND setting."""
+    global _router
+    with _router_lock:
+        _router = router
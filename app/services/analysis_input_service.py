@@ -0,0 +1,62 @@
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.analysis_input import AnalysisInput
+from app.schemas.habit_analysis_input_schema import HabitAnalysisInput
+from app.utils.deadline import start_deadline
+
+logger = logging.getLogger(__name__)
+
+# The app keeps the user's habits on the device and sends them with every
+# /suggestions/analyze call, so the last payload is the only server-side copy.
+# The nightly job (scripts/pregenerate_suggestions.py) replays it: same habits and
+# period, hence the same fingerprints as the interactive run it prepares for.
+
+
+def save_analysis_input(db: Session, habitAnalysisInput: HabitAnalysisInput) -> None:
+    """Keep the payload as received (before performance metrics) as the user's last."""
+    stored = db.get(AnalysisInput, habitAnalysisInput.user_id)
+    if stored is None:
+        stored = AnalysisInput(user_id=habitAnalysisInput.user_id)
+        db.add(stored)
+    stored.payload = habitAnalysisInput.model_dump_json(by_alias=True)
+    stored.received_at = datetime.now()
+    db.commit()
+
+
+def store_analysis_input(habitAnalysisInput: HabitAnalysisInput) -> None:
+    """save_analysis_input in a session of its own (background task)."""
+    # The request's deadline is over by now, the write isn't part of it
+    start_deadline(None)
+    db = SessionLocal()
+    try:
+        save_analysis_input(db, habitAnalysisInput)
+    except Exception:
+        logger.exception(
+            "Saving the analysis input failed for user %s", habitAnalysisInput.user_id
+        )
+    finally:
+        db.close()
+
+
+def get_active_user_ids(db: Session, since: datetime) -> List[str]:
+    """Users who called /suggestions/analyze since `since`."""
+    query = (
+        select(AnalysisInput.user_id)
+        .where(AnalysisInput.received_at >= since)
+        .order_by(AnalysisInput.user_id)
+    )
+    return list(db.execute(query).scalars())
+
+
+def build_analysis_input(db: Session, user_id: str) -> Optional[HabitAnalysisInput]:
+    """The user's last /suggestions/analyze payload, None if there is none."""
+    stored = db.get(AnalysisInput, user_id)
+    if stored is None:
+        return None
+    return HabitAnalysisInput.model_validate_json(stored.payload)
@@ -0,0 +1,142 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app.schemas.habit_analysis_input_schema import HabitData
+from app.schemas.habit_exception_schema import HabitExceptionBase
+
+# The prompt gets these aggregates instead of one object per exception, which grows
+# with every tracked day. false sends the raw exceptions as before.
+AI_PROMPT_SUMMARIZE_EXCEPTIONS = (
+    os.getenv("AI_PROMPT_SUMMARIZE_EXCEPTIONS", "true").lower() == "true"
+)
+
+RECENT_WEEK_DAYS = 7
+TREND_THRESHOLD = 0.1  # completion rate change below this counts as stable
+LAST_VALUES_COUNT = 5
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def habit_for_prompt(
+    habit: HabitData,
+    end_date: datetime,
+    summarize: bool = AI_PROMPT_SUMMARIZE_EXCEPTIONS,
+) -> dict:
+    """The habit as sent to the AI, with exceptions replaced by their summary."""
+    if not summarize:
+        return habit.model_dump()
+    data = habit.model_dump(exclude={"exceptions"})
+    data["exception_summary"] = summarize_exceptions(habit.exceptions, end_date)
+    return data
+
+
+def summarize_exceptions(
+    exceptions: List[HabitExceptionBase], end_date: datetime
+) -> Optional[dict]:
+    """
+    Aggregates of a habit's exceptions (logged days):
+    - logged_days, skipped_days, completed_days
+    - skip_rate_by_weekday: skipped / logged days, for the weekdays with logs
+    - recent_week_trend: completion rate of the last 7 days vs the 7 days before
+    - longest_gap_days: most consecutive days without a completion, up to end_date
+    - last_values: the last LAST_VALUES_COUNT logged days
+    """
+    if not exceptions:
+        return None
+
+    ordered = sorted(
+        (e for e in exceptions if e.date <= end_date), key=lambda e: e.date
+    )
+    if not ordered:
+        return None
+
+    logged_by_weekday = defaultdict(int)
+    skipped_by_weekday = defaultdict(int)
+    for exception in ordered:
+        weekday = WEEKDAYS[exception.date.weekday()]
+        logged_by_weekday[weekday] += 1
+        skipped_by_weekday[weekday] += exception.is_skipped
+
+    return {
+        "logged_days": len(ordered),
+        "skipped_days": sum(1 for e in ordered if e.is_skipped),
+        "completed_days": sum(1 for e in ordered if _is_completed(e)),
+        "skip_rate_by_weekday": {
+            weekday: round(skipped_by_weekday[weekday] / logged_by_weekday[weekday], 2)
+            for weekday in WEEKDAYS
+            if logged_by_weekday[weekday]
+        },
+        "recent_week_trend": _recent_week_trend(ordered, end_date),
+        "longest_gap_days": _longest_gap_days(ordered, end_date),
+        "last_values": [_compact_exception(e) for e in ordered[-LAST_VALUES_COUNT:]],
+    }
+
+
+# ==========================================================
+# Helper Functions
+# ==========================================================
+
+
+def _is_completed(exception: HabitExceptionBase) -> bool:
+    return bool(exception.is_completed) and not exception.is_skipped
+
+
+def _completion_rate(exceptions: List[HabitExceptionBase]) -> Optional[float]:
+    if not exceptions:
+        return None
+    return round(sum(1 for e in exceptions if _is_completed(e)) / len(exceptions), 2)
+
+
+def _recent_week_trend(
+    ordered: List[HabitExceptionBase], end_date: datetime
+) -> dict:
+    week_start = end_date - timedelta(days=RECENT_WEEK_DAYS)
+    previous_start = week_start - timedelta(days=RECENT_WEEK_DAYS)
+    last_week = _completion_rate([e for e in ordered if e.date > week_start])
+    previous_week = _completion_rate(
+        [e for e in ordered if previous_start < e.date <= week_start]
+    )
+
+    if last_week is None or previous_week is None:
+        direction = "unknown"
+    elif last_week - previous_week >= TREND_THRESHOLD:
+        direction = "improving"
+    elif previous_week - last_week >= TREND_THRESHOLD:
+        direction = "declining"
+    else:
+        direction = "stable"
+    return {
+        "last_week_completion_rate": last_week,
+        "previous_week_completion_rate": previous_week,
+        "direction": direction,
+    }
+
+
+def _longest_gap_days(ordered: List[HabitExceptionBase], end_date: datetime) -> int:
+    """Longest run of days between completions, counting the stretch up to end_date."""
+    completion_days = sorted({e.date.date() for e in ordered if _is_completed(e)})
+    if not completion_days:
+        return (end_date.date() - ordered[0].date.date()).days + 1
+
+    longest = (end_date.date() - completion_days[-1]).days
+    for previous, current in zip(completion_days, completion_days[1:]):
+        longest = max(longest, (current - previous).days - 1)
+    return longest
+
+
+def _compact_exception(exception: HabitExceptionBase) -> dict:
+    compact = {
+        "date": exception.date.strftime("%Y-%m-%d"),
+        "skipped": exception.is_skipped,
+        "completed": _is_completed(exception),
+    }
+    # Same value apply_exceptions counts as progress
+    value = (
+        exception.target_value
+        if exception.target_value is not None
+        else exception.current_value
+    )
+    if value is not None:
+        compact["value"] = value
+    return compact
@@ -0,0 +1,89 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.habit_fingerprint import HabitFingerprint
+from app.schemas.habit_analysis_input_schema import HabitAnalysisInput, HabitData
+
+# Repeat analyses only send the habits whose state changed since the user's last AI
+# suggestion run; the last run's suggestions for the other habits (its snapshot) are
+# merged into the answer. When nothing changed, the stored suggestions are returned
+# without an AI call.
+SUGGESTION_DELTA_ENABLED = os.getenv("SUGGESTION_DELTA_ENABLED", "true").lower() == "true"
+# Scores are rounded to this many points before fingerprinting, smaller moves are noise
+FINGERPRINT_SCORE_STEP = float(os.getenv("FINGERPRINT_SCORE_STEP", "5"))
+
+
+def habit_fingerprint(habit: HabitData) -> str:
+    """
+    Hash of what the suggestions depend on: the habit's definition and its metrics,
+    rounded to FINGERPRINT_SCORE_STEP. Habits must carry their performance_metric.
+    """
+    metric = habit.performance_metric
+    parts = [
+        habit.name.strip().lower(),
+        habit.category.id,
+        habit.tracking_type.value,
+        str(habit.target_value),
+        habit.unit or "",
+        habit.repeat_frequency.value if habit.repeat_frequency else "",
+        habit.until_date.date().isoformat() if habit.until_date else "",
+        str(_bucket(metric.score)) if metric else "",
+        str(_bucket(metric.completion_rate)) if metric else "",
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+def compute_fingerprints(habitAnalysisInput: HabitAnalysisInput) -> Dict[str, str]:
+    return {h.id: habit_fingerprint(h) for h in habitAnalysisInput.habits}
+
+
+def changed_habit_ids(
+    db: Session, user_id: str, fingerprints: Dict[str, str]
+) -> Set[str]:
+    """Habits that are new or whose fingerprint differs from the last stored one."""
+    stored = dict(
+        db.query(HabitFingerprint.habit_id, HabitFingerprint.fingerprint)
+        .filter(HabitFingerprint.user_id == user_id)
+        .all()
+    )
+    return {
+        habit_id
+        for habit_id, fingerprint in fingerprints.items()
+        if stored.get(habit_id) != fingerprint
+    }
+
+
+def save_fingerprints(
+    db: Session, habitAnalysisInput: HabitAnalysisInput, fingerprints: Dict[str, str]
+) -> None:
+    """Store the fingerprints the user's latest suggestions are based on."""
+    user_id = habitAnalysisInput.user_id
+    existing = {
+        f.habit_id: f
+        for f in db.query(HabitFingerprint).filter(HabitFingerprint.user_id == user_id)
+    }
+    now = datetime.now()
+    for habit in habitAnalysisInput.habits:
+        row = existing.get(habit.id)
+        if row is None:
+            row = HabitFingerprint(user_id=user_id, habit_id=habit.id)
+            db.add(row)
+        row.fingerprint = fingerprints[habit.id]
+        row.score = habit.performance_metric.score if habit.performance_metric else None
+        row.updated_at = now
+    db.commit()
+
+
+# ==========================================================
+# Helper Functions
+# ==========================================================
+
+
+def _bucket(value):
+    if value is None:
+        return None
+    return round(value / FINGERPRINT_SCORE_STEP)
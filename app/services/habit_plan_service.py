@@ -1,65 +1,206 @@
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+import orjson
+from cachetools import TTLCache
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
+from typing import Callable, List, Optional, Union
+from app.models.habit import Habit
 from app.models.habit_plan import HabitPlan
 from app.models.suggestion import Suggestion
 from app.schemas.habit_plan_schema import HabitPlanResponse
+from app.utils.metrics import CACHE_REQUESTS
+from app.utils.static_files import ImageVariant, versioned_static_url
 
+# Habit plans are seed data that rarely change, so validated responses are kept in memory
+# together with their encoded JSON body and ETag.
+# The app itself never writes plans: they are changed by scripts/setup_database.py or SQL,
+# from another process, so edits show up once HABIT_PLAN_CACHE_TTL expires (no explicit
+# invalidation). invalidate_habit_plan_cache() is for scripts that need a cold cache.
+HABIT_PLAN_CACHE_TTL = int(os.getenv("HABIT_PLAN_CACHE_TTL", "300"))  # seconds
+HABIT_PLAN_CACHE_SIZE = int(os.getenv("HABIT_PLAN_CACHE_SIZE", "1024"))  # entries
 
-def get_habit_plans(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[HabitPlanResponse]:
-    """Get all habit plans and convert to response schema"""
-    db_plans = (
+logger = logging.getLogger(__name__)
+
+_plan_cache = TTLCache(maxsize=HABIT_PLAN_CACHE_SIZE, ttl=HABIT_PLAN_CACHE_TTL)
+_plan_cache_lock = threading.Lock()  # TTLCache is not thread-safe
+
+
+@dataclass(frozen=True)
+class HabitPlanPayload:
+    """
+    A cached habit plan response: validated data, encoded JSON body and its ETag.
+    Shared by every request, so `data` must not be modified (the get_habit_plan*
+    functions return copies).
+    """
+
+    data: Union[List[HabitPlanResponse], HabitPlanResponse]
+    body: bytes
+    etag: str
+
+
+def _build_payload(
+    data: Union[List[HabitPlanResponse], HabitPlanResponse]
+) -> HabitPlanPayload:
+    # Same JSON shape FastAPI produces for response_model (aliases, ISO dates)
+    if isinstance(data, list):
+        content = [plan.model_dump(mode="json", by_alias=True) for plan in data]
+    else:
+        content = data.model_dump(mode="json", by_alias=True)
+    body = orjson.dumps(content)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return HabitPlanPayload(data=data, body=body, etag=etag)
+
+
+def invalidate_habit_plan_cache() -> None:
+    """Drop every cached habit plan response."""
+    with _plan_cache_lock:
+        _plan_cache.clear()
+
+
+def _get_or_load(key: tuple, loader: Callable):
+    """Return the cached value for key, calling loader() on a miss. None is never cached."""
+    with _plan_cache_lock:
+        value = _plan_cache.get(key)
+    if value is not None:
+        CACHE_REQUESTS.labels(cache="habit_plans", result="hit").inc()
+        return value
+
+    CACHE_REQUESTS.labels(cache="habit_plans", result="miss").inc()
+    # Load outside the lock so a slow query doesn't block other cache readers
+    value = loader()
+    if value is not None:
+        with _plan_cache_lock:
+            _plan_cache[key] = value
+    return value
+
+
+def _habit_plan_query(db: Session) -> Query:
+    """
+    Base query with every relationship HabitPlanResponse serializes loaded up front.
+    Collections use selectinload (one extra IN query each) instead of joinedload, so
+    rows aren't multiplied per plan x suggestion and LIMIT/OFFSET apply to plans directly.
+    """
+    return (
         db.query(HabitPlan)
         .options(joinedload(HabitPlan.category))
-        .options(joinedload(HabitPlan.suggestions).joinedload(Suggestion.habit))
-        .offset(skip)
-        .limit(limit)
-        .all()
+        .options(
+            selectinload(HabitPlan.suggestions)
+            .joinedload(Suggestion.habit)
+            .options(joinedload(Habit.category), selectinload(Habit.habit_series))
+        )
+        .order_by(HabitPlan.id)  # stable pages
     )
-    # Convert model to dict before validation to handle nested relationships
+
+
+def _validate_plan(
+    plan: HabitPlan, image_variant: Optional[ImageVariant] = None
+) -> Optional[HabitPlanResponse]:
+    """Validate a plan and point image_path at the content-hashed (variant) image."""
+    try:
+        response = HabitPlanResponse.model_validate(plan)
+    except Exception as e:
+        logger.warning("Error validating plan %s: %s", plan.id, e)
+        return None
+    response.image_path = versioned_static_url(response.image_path, image_variant)
+    return response
+
+
+def _validate_plans(
+    db_plans: List[HabitPlan], image_variant: Optional[ImageVariant] = None
+) -> List[HabitPlanResponse]:
     results = []
     for plan in db_plans:
-        try:
-            results.append(HabitPlanResponse.model_validate(plan))
-        except Exception as e:
-            print(f"Error validating plan {plan.id}: {e}")
+        response = _validate_plan(plan, image_variant)
+        if response is not None:
+            results.append(response)
     return results
 
 
-def get_habit_plan_by_id(db: Session, plan_id: str) -> Optional[HabitPlanResponse]:
-    """Get a specific habit plan by ID and convert to response schema"""
-    db_plan = (
-        db.query(HabitPlan)
-        .options(joinedload(HabitPlan.category))
-        .options(joinedload(HabitPlan.suggestions).joinedload(Suggestion.habit))
-        .filter(HabitPlan.id == plan_id)
-        .first()
+def get_habit_plans(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    image_variant: Optional[ImageVariant] = None,
+) -> List[HabitPlanResponse]:
+    """Get all habit plans and convert to response schema"""
+    payload = get_habit_plans_payload(
+        db, skip=skip, limit=limit, image_variant=image_variant
     )
-    if db_plan:
-        try:
-            return HabitPlanResponse.model_validate(db_plan)
-        except Exception as e:
-            print(f"Error validating plan {plan_id}: {e}")
-            return None
-    return None
+    return [plan.model_copy(deep=True) for plan in payload.data]
+
+
+def get_habit_plans_payload(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    image_variant: Optional[ImageVariant] = None,
+) -> HabitPlanPayload:
+    """Get all habit plans as a pre-encoded payload"""
+
+    def load():
+        db_plans = _habit_plan_query(db).offset(skip).limit(limit).all()
+        return _build_payload(_validate_plans(db_plans, image_variant))
+
+    return _get_or_load(("all", skip, limit, image_variant), load)
+
+
+def get_habit_plan_by_id(
+    db: Session, plan_id: str, image_variant: Optional[ImageVariant] = None
+) -> Optional[HabitPlanResponse]:
+    """Get a specific habit plan by ID and convert to response schema"""
+    payload = get_habit_plan_payload_by_id(db, plan_id, image_variant=image_variant)
+    return payload.data.model_copy(deep=True) if payload else None
+
+
+def get_habit_plan_payload_by_id(
+    db: Session, plan_id: str, image_variant: Optional[ImageVariant] = None
+) -> Optional[HabitPlanPayload]:
+    """Get a specific habit plan as a pre-encoded payload"""
+
+    def load():
+        db_plan = _habit_plan_query(db).filter(HabitPlan.id == plan_id).first()
+        if db_plan:
+            response = _validate_plan(db_plan, image_variant)
+            return _build_payload(response) if response else None
+        return None
+
+    return _get_or_load(("id", plan_id, image_variant), load)
 
 
 def get_habit_plans_by_category(
-    db: Session, category_id: str
+    db: Session,
+    category_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    image_variant: Optional[ImageVariant] = None,
 ) -> List[HabitPlanResponse]:
     """Get all habit plans for a specific category and convert to response schema"""
-    db_plans = (
-        db.query(HabitPlan)
-        .options(joinedload(HabitPlan.category))
-        .options(joinedload(HabitPlan.suggestions).joinedload(Suggestion.habit))
-        .filter(HabitPlan.category_id == category_id)
-        .all()
+    payload = get_habit_plans_payload_by_category(
+        db, category_id, skip=skip, limit=limit, image_variant=image_variant
     )
-    results = []
-    for plan in db_plans:
-        try:
-            results.append(HabitPlanResponse.model_validate(plan))
-        except Exception as e:
-            print(f"Error validating plan {plan.id}: {e}")
-    return results
+    return [plan.model_copy(deep=True) for plan in payload.data]
+
+
+def get_habit_plans_payload_by_category(
+    db: Session,
+    category_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    image_variant: Optional[ImageVariant] = None,
+) -> HabitPlanPayload:
+    """Get all habit plans for a specific category as a pre-encoded payload"""
+
+    def load():
+        db_plans = (
+            _habit_plan_query(db)
+            .filter(HabitPlan.category_id == category_id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return _build_payload(_validate_plans(db_plans, image_variant))
+
+    return _get_or_load(("category", category_id, skip, limit, image_variant), load)
@@ -0,0 +1,118 @@
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+from app.schemas.habit_analysis_input_schema import HabitAnalysisInput, HabitData
+
+# The prompt asks the model to improve at most 2 existing habits, so only the habits
+# most worth improving are sent, plus an aggregate profile of all habits for context.
+# One small prompt instead of one prompt per 300 habits and refine rounds.
+# 0 sends every habit, chunked, as before.
+AI_PROMPT_MAX_HABITS = int(os.getenv("AI_PROMPT_MAX_HABITS", "10"))
+
+RECENT_DAYS = 14  # window compared with the rest of the period to detect a decline
+DECLINE_WEIGHT = 0.5  # a full drop from always to never completed adds this to the priority
+CATEGORY_REPEAT_PENALTY = 0.7  # priority factor per already-selected habit of the category
+UNSCORED_PRIORITY = 0.5  # habits without a performance metric
+PROFILE_TOP_NAMES = 20
+
+
+def select_habits_for_prompt(
+    habitAnalysisInput: HabitAnalysisInput,
+    limit: int = AI_PROMPT_MAX_HABITS,
+    candidate_ids: Optional[Set[str]] = None,
+) -> Tuple[List[HabitData], dict]:
+    """
+    Pick up to `limit` habits with the most improvement potential (low score, recent
+    decline), spread across categories, and summarize all habits in a profile.
+    candidate_ids restricts the pick (e.g. to changed habits), not the profile.
+    """
+    habits = habitAnalysisInput.habits
+    priorities = [
+        _improvement_priority(h, habitAnalysisInput.end_date) for h in habits
+    ]
+
+    selected: List[HabitData] = []
+    remaining = {
+        i
+        for i, h in enumerate(habits)
+        if candidate_ids is None or h.id in candidate_ids
+    }
+    category_counts: Counter = Counter()
+    while remaining and len(selected) < limit:
+        # Greedy: each pick lowers the priority of other habits in its category.
+        # Ties go to the habit listed first.
+        best = max(
+            remaining,
+            key=lambda i: (
+                priorities[i]
+                * CATEGORY_REPEAT_PENALTY ** category_counts[habits[i].category.id],
+                -i,
+            ),
+        )
+        selected.append(habits[best])
+        remaining.remove(best)
+        category_counts[habits[best].category.id] += 1
+
+    return selected, build_habit_profile(habits)
+
+
+def build_habit_profile(habits: List[HabitData]) -> dict:
+    """Aggregate view of all habits: counts, scores per category, common names."""
+    scores = [h.performance_metric.score for h in habits if h.performance_metric]
+    by_category = defaultdict(list)
+    for h in habits:
+        by_category[h.category.id].append(
+            h.performance_metric.score if h.performance_metric else None
+        )
+
+    categories = {}
+    for category_id, category_scores in sorted(by_category.items()):
+        known = [s for s in category_scores if s is not None]
+        categories[category_id] = {
+            "habits": len(category_scores),
+            "average_score": round(sum(known) / len(known), 1) if known else None,
+        }
+
+    return {
+        "total_habits": len(habits),
+        "average_score": round(sum(scores) / len(scores), 1) if scores else None,
+        "categories": categories,
+        "tracking_types": dict(Counter(h.tracking_type.value for h in habits)),
+        "repeat_frequencies": dict(
+            Counter(h.repeat_frequency.value for h in habits if h.repeat_frequency)
+        ),
+        "common_habit_names": [
+            name
+            for name, _ in Counter(h.name for h in habits).most_common(PROFILE_TOP_NAMES)
+        ],
+    }
+
+
+# ==========================================================
+# Helper Functions
+# ==========================================================
+
+
+def _improvement_priority(habit: HabitData, end_date: datetime) -> float:
+    if habit.performance_metric is None:
+        return UNSCORED_PRIORITY
+    score = min(max(habit.performance_metric.score, 0.0), 100.0)
+    decline = _recent_decline(habit, end_date) or 0.0
+    return (100.0 - score) / 100.0 + DECLINE_WEIGHT * max(decline, 0.0)
+
+
+def _recent_decline(habit: HabitData, end_date: datetime) -> Optional[float]:
+    """
+    Completion rate of the logged days before the last RECENT_DAYS minus the rate
+    within them, from the habit's exceptions (None without data on both sides).
+    """
+    recent_start = end_date - timedelta(days=RECENT_DAYS)
+    before, recent = [], []
+    for exception in habit.exceptions:
+        completed = bool(exception.is_completed) and not exception.is_skipped
+        (recent if exception.date >= recent_start else before).append(completed)
+    if not before or not recent:
+        return None
+    return sum(before) / len(before) - sum(recent) / len(recent)
@@ -1,13 +1,14 @@
 import calendar
 from typing import List
 from datetime import datetime, timedelta
-import uuid
 
 from app.models.habit import RepeatFrequency, TrackingType
 from app.models.performance_metric import PerformanceMetric
 from app.schemas.habit_analysis_input_schema import HabitAnalysisInput, HabitData
 from app.schemas.habit_exception_schema import HabitExceptionBase
 from app.schemas.performance_metric_schema import PerformanceMetricResponse
+from app.utils.id_generator import generate_uuid
+from app.utils.tracing import span
 
 
 def calculate_performance_metrics(
@@ -17,23 +18,26 @@ def calculate_performance_metrics(
     Calculate performance metrics for each habit based on generated Habit Instances.
     """
 
-    updated_habits = []
+    with span("metrics"):
+        updated_habits = []
 
-    for habit in habit_analysis_input.habits:
-        # Generate Habit Instances
-        habit_instances = generate_habit_instances(habit, habit_analysis_input.end_date)
+        for habit in habit_analysis_input.habits:
+            # Generate Habit Instances
+            habit_instances = generate_habit_instances(
+                habit, habit_analysis_input.end_date
+            )
 
-        # Apply exceptions
-        habit_instances = apply_exceptions(habit_instances, habit.exceptions)
+            # Apply exceptions
+            habit_instances = apply_exceptions(habit_instances, habit.exceptions)
 
-        # Calculate performance metrics
-        performance_metric = compute_performance_metric(habit, habit_instances)
+            # Calculate performance metrics
+            performance_metric = compute_performance_metric(habit, habit_instances)
 
-        # Update HabitData with performance_metric
-        updated_habit = habit.model_copy(
-            update={"performance_metric": performance_metric}
-        )
-        updated_habits.append(updated_habit)
+            # Update HabitData with performance_metric
+            updated_habit = habit.model_copy(
+                update={"performance_metric": performance_metric}
+            )
+            updated_habits.append(updated_habit)
 
     # Return updated HabitAnalysisInput with modified habits
     return habit_analysis_input.model_copy(update={"habits": updated_habits})
@@ -126,14 +130,14 @@ def compute_performance_metric(
         )
         score = (
             (total_progress / (habit.target_value * total_instances)) * 100
-            if habit.target_value
+            if habit.target_value and total_instances > 0
             else 0
         )
 
     description = generate_performance_description(habit.name, score)
 
     return PerformanceMetricResponse(
-        id=str(uuid.uuid4()),
+        id=generate_uuid(),
         habit_id=habit.id,
         score=score,
         completion_rate=completion_rate,
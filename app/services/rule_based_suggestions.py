@@ -0,0 +1,183 @@
+import copy
+from datetime import datetime, timezone
+from typing import List
+
+from app.models.habit import RepeatFrequency, TrackingType
+from app.schemas.habit_analysis_input_schema import HabitAnalysisInput, HabitData
+from app.schemas.suggestion_schema import SuggestionResponse
+from app.utils.id_generator import generate_uuid
+from app.utils.sample_suggestions import SAMPLE_SUGGESTIONS
+
+# Deterministic suggestions from the performance metrics computed by habit_service,
+# following the same plan as the AI prompt: at most 2 improvements to struggling
+# existing habits, the rest new habits from categories the user doesn't cover yet.
+# Runs in a few milliseconds, so it can answer before (or instead of) the AI.
+
+LOW_SCORE_THRESHOLD = 50.0  # 0-100, habits below this get an improvement suggestion
+VERY_LOW_SCORE_THRESHOLD = 30.0  # daily habits below this are moved to weekly
+MAX_IMPROVEMENTS = 2
+
+
+def generate_rule_based_suggestions(
+    habitAnalysisInput: HabitAnalysisInput, limit: int = 5
+) -> List[SuggestionResponse]:
+    """
+    Build up to `limit` suggestions for the user. Habits must already carry their
+    performance_metric (see calculate_performance_metrics).
+    """
+    user_id = habitAnalysisInput.user_id
+    now = datetime.now(timezone.utc)
+
+    suggestions = []
+    for habit in _struggling_habits(habitAnalysisInput.habits)[:MAX_IMPROVEMENTS]:
+        suggestions.append(_improvement_suggestion(habit, user_id, now))
+
+    for template in _new_habit_templates(
+        habitAnalysisInput.habits, limit - len(suggestions)
+    ):
+        suggestions.append(_new_habit_suggestion(template, user_id, now))
+
+    return suggestions[:limit]
+
+
+# ==========================================================
+# Helper Functions
+# ==========================================================
+
+
+def _struggling_habits(habits: List[HabitData]) -> List[HabitData]:
+    """Habits scoring below LOW_SCORE_THRESHOLD, lowest score first."""
+    scored = [
+        h
+        for h in habits
+        if h.performance_metric is not None
+        and h.performance_metric.score < LOW_SCORE_THRESHOLD
+    ]
+    return sorted(scored, key=lambda h: (h.performance_metric.score, h.id))
+
+
+def _improvement_suggestion(
+    habit: HabitData, user_id: str, now: datetime
+) -> SuggestionResponse:
+    metric = habit.performance_metric
+    score = round(metric.score)
+    repeat_frequency = habit.repeat_frequency or RepeatFrequency.DAILY
+    target_value = habit.target_value
+
+    if habit.tracking_type == TrackingType.PROGRESS and habit.target_value:
+        # Aim just above what the user actually achieves, then build up again
+        average = metric.average_progress or 0
+        target_value = max(1, min(habit.target_value - 1, round(average * 1.1)))
+        unit = f" {habit.unit}" if habit.unit else ""
+        title = f"Make {habit.name} Easier to Keep Up"
+        description = (
+            f"You're reaching about {score}% of your {habit.target_value}{unit} target. "
+            f"Lower it to {target_value}{unit} for now and raise it again once you "
+            "hit it consistently: small wins make the habit stick."
+        )
+    elif (
+        repeat_frequency == RepeatFrequency.DAILY
+        and metric.score < VERY_LOW_SCORE_THRESHOLD
+    ):
+        repeat_frequency = RepeatFrequency.WEEKLY
+        title = f"Restart {habit.name} Weekly"
+        description = (
+            f"You completed {habit.name} on {score}% of the planned days. "
+            "Switch to a weekly schedule with a reminder to rebuild the routine, "
+            "then go back to daily when it feels easy."
+        )
+    else:
+        title = f"Anchor {habit.name} to Your Routine"
+        description = (
+            f"You completed {habit.name} {score}% of the time. Do it right after "
+            "something you already do every day and turn on a reminder, so it "
+            "doesn't depend on remembering."
+        )
+
+    series_id = generate_uuid()
+    return SuggestionResponse(
+        id=generate_uuid(),
+        user_id=user_id,
+        title=title,
+        description=description,
+        habit={
+            "id": habit.id,
+            "name": habit.name,
+            "userId": user_id,
+            "category": habit.category.model_dump(by_alias=True),
+            "date": now,
+            "series": {
+                "id": series_id,
+                "userId": user_id,
+                "habitId": habit.id,
+                "startDate": now,
+                "untilDate": habit.until_date,
+                "repeatFrequency": repeat_frequency,
+            },
+            "reminderEnabled": True,
+            "trackingType": habit.tracking_type,
+            "targetValue": target_value,
+            "currentValue": 0,
+            "unit": habit.unit,
+            "isCompleted": False,
+        },
+        created_at=now,
+    )
+
+
+def _new_habit_templates(habits: List[HabitData], count: int) -> List[dict]:
+    """
+    Sample suggestions for habits the user doesn't have, one per category, categories
+    the user doesn't cover yet first (in SAMPLE_SUGGESTIONS order).
+    """
+    if count <= 0:
+        return []
+
+    user_categories = {h.category.id for h in habits}
+    user_habit_names = {h.name.strip().lower() for h in habits}
+    candidates = [
+        t
+        for t in SAMPLE_SUGGESTIONS
+        if t["habit"]["name"].strip().lower() not in user_habit_names
+    ]
+    candidates.sort(key=lambda t: t["habit"]["category"]["id"] in user_categories)
+
+    selected, used_categories = [], set()
+    for template in candidates:
+        category_id = template["habit"]["category"]["id"]
+        if category_id not in used_categories:
+            selected.append(template)
+            used_categories.add(category_id)
+    # Not enough distinct categories: allow repeats
+    for template in candidates:
+        if template not in selected:
+            selected.append(template)
+    return selected[:count]
+
+
+def _new_habit_suggestion(template: dict, user_id: str, now: datetime) -> SuggestionResponse:
+    habit = copy.deepcopy(template["habit"])
+    habit_id = generate_uuid()
+
+    habit["id"] = habit_id
+    habit["userId"] = user_id
+    habit["date"] = now
+    if habit.get("series"):
+        habit["series"].update(
+            {
+                "id": generate_uuid(),
+                "userId": user_id,
+                "habitId": habit_id,
+                "startDate": now,
+                "untilDate": None,
+            }
+        )
+
+    return SuggestionResponse(
+        id=generate_uuid(),
+        user_id=user_id,
+        title=template["title"],
+        description=template["description"],
+        habit=habit,
+        created_at=now,
+    )
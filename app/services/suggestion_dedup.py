@@ -0,0 +1,180 @@
+import hashlib
+import os
+import re
+import struct
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy.orm import Session
+
+from app.models.habit import Habit as HabitModel
+from app.models.suggestion import Suggestion as SuggestionModel
+from app.schemas.suggestion_schema import SuggestionResponse
+from app.utils.metrics import CACHE_REQUESTS, SUGGESTION_DUPLICATES
+
+# Repeat analyses return the same suggestions with small wording changes ("Stay Hydrated
+# Regularly" again and again), each saved as a new Habit + Series + Suggestion.
+# Before saving, suggestions are compared with the user's existing ones (and each other)
+# using MinHash signatures of habit name + title + description, looked up in an LSH
+# index per user. Indexes are built from the database on first use and kept for
+# SUGGESTION_DEDUP_INDEX_TTL seconds, so suggestions saved by other workers are
+# picked up after that.
+SUGGESTION_DEDUP_ENABLED = os.getenv("SUGGESTION_DEDUP_ENABLED", "true").lower() == "true"
+# Estimated Jaccard similarity of the shingles above which a suggestion is a duplicate
+SUGGESTION_DEDUP_THRESHOLD = float(os.getenv("SUGGESTION_DEDUP_THRESHOLD", "0.5"))
+SUGGESTION_DEDUP_INDEX_TTL = int(os.getenv("SUGGESTION_DEDUP_INDEX_TTL", "600"))  # seconds
+SUGGESTION_DEDUP_INDEX_SIZE = int(os.getenv("SUGGESTION_DEDUP_INDEX_SIZE", "1000"))  # users
+
+SHINGLE_SIZE = 4  # characters
+NUM_PERM = 64
+# 32 bands x 2 rows: a pair at 0.5 similarity shares a band with > 99.9% probability,
+# candidates are then checked against the threshold
+LSH_BANDS = 32
+# One SHAKE digest per shingle gives its NUM_PERM 32-bit hashes in a single C call
+# (and, unlike hash(), the same values in every process)
+_HASHES_FORMAT = struct.Struct(f"<{NUM_PERM}I")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+Signature = Tuple[int, ...]
+
+
+class MinHashLSH:
+    """Locality-sensitive hashing index over MinHash signatures."""
+
+    def __init__(self, bands: int = LSH_BANDS):
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._buckets: Dict[Tuple[int, Signature], Set[str]] = defaultdict(set)
+        self._signatures: Dict[str, Signature] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, key: str, signature: Signature) -> None:
+        self._signatures[key] = signature
+        for band in self._bands(signature):
+            self._buckets[band].add(key)
+
+    def find_similar(self, signature: Signature, threshold: float) -> List[str]:
+        """Keys whose estimated similarity with `signature` is at least `threshold`."""
+        candidates = set()
+        for band in self._bands(signature):
+            candidates |= self._buckets.get(band, set())
+        return [
+            key
+            for key in candidates
+            if estimate_similarity(signature, self._signatures[key]) >= threshold
+        ]
+
+    def _bands(self, signature: Signature) -> Iterable[Tuple[int, Signature]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows : (band + 1) * self.rows]
+
+
+def minhash_signature(text: str) -> Signature:
+    """MinHash of the character shingles of the normalized text."""
+    normalized = " ".join(_WORD_RE.findall(text.lower()))
+    shingles = {
+        normalized[i : i + SHINGLE_SIZE]
+        for i in range(max(1, len(normalized) - SHINGLE_SIZE + 1))
+    }
+    hashes = [
+        _HASHES_FORMAT.unpack(
+            hashlib.shake_128(shingle.encode()).digest(_HASHES_FORMAT.size)
+        )
+        for shingle in shingles
+    ]
+    # Column-wise minimum: the smallest hash of each of the NUM_PERM functions
+    return tuple(map(min, zip(*hashes)))
+
+
+def estimate_similarity(a: Signature, b: Signature) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def suggestion_text(title: str, description: str, habit_name: str = "") -> str:
+    return f"{habit_name} {title} {description}"
+
+
+_indexes = TTLCache(maxsize=SUGGESTION_DEDUP_INDEX_SIZE, ttl=SUGGESTION_DEDUP_INDEX_TTL)
+_indexes_lock = threading.Lock()  # TTLCache is not thread-safe
+
+
+def invalidate_dedup_index(user_id: str) -> None:
+    """Drop the user's index, e.g. after deleting their suggestions."""
+    with _indexes_lock:
+        _indexes.pop(user_id, None)
+
+
+def filter_duplicate_suggestions(
+    db: Session, user_id: str, rows: List[Tuple[str, SuggestionResponse]]
+) -> List[Tuple[str, SuggestionResponse]]:
+    """
+    `rows` are (ID of the Suggestion row about to be saved, suggestion). Return those
+    that are not near-duplicates of the user's saved suggestions or of an earlier one
+    in the list, and add them to the user's index under their row ID, the key the
+    index is rebuilt with from the database. If the rows then aren't saved, call
+    invalidate_dedup_index().
+    """
+    if not SUGGESTION_DEDUP_ENABLED or not rows:
+        return rows
+
+    signatures = [
+        minhash_signature(
+            suggestion_text(s.title, s.description, s.habit.name if s.habit else "")
+        )
+        for _, s in rows
+    ]
+    index = _get_index(db, user_id)
+    unique = []
+    # Several requests of the same user may save at the same time
+    with _indexes_lock:
+        for (row_id, suggestion), signature in zip(rows, signatures):
+            if index.find_similar(signature, SUGGESTION_DEDUP_THRESHOLD):
+                SUGGESTION_DUPLICATES.inc()
+                continue
+            index.add(row_id, signature)
+            unique.append((row_id, suggestion))
+    return unique
+
+
+# ==========================================================
+# Helper Functions
+# ==========================================================
+
+
+def _get_index(db: Session, user_id: str) -> MinHashLSH:
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+    if index is not None:
+        CACHE_REQUESTS.labels(cache="suggestion_dedup", result="hit").inc()
+        return index
+
+    CACHE_REQUESTS.labels(cache="suggestion_dedup", result="miss").inc()
+    index = _build_index(db, user_id)
+    with _indexes_lock:
+        # Another request may have built it meanwhile, keep a single index per user
+        return _indexes.setdefault(user_id, index)
+
+
+def _build_index(db: Session, user_id: str) -> MinHashLSH:
+    rows = (
+        db.query(
+            SuggestionModel.id,
+            SuggestionModel.title,
+            SuggestionModel.description,
+            HabitModel.name,
+        )
+        .outerjoin(HabitModel, HabitModel.id == SuggestionModel.habit_id)
+        .filter(SuggestionModel.user_id == user_id)
+        .all()
+    )
+    index = MinHashLSH()
+    for suggestion_id, title, description, habit_name in rows:
+        index.add(
+            suggestion_id,
+            minhash_signature(suggestion_text(title, description, habit_name or "")),
+        )
+    return index
@@ -0,0 +1,95 @@
+import os
+from functools import lru_cache
+from typing import Dict, Optional, Set
+
+from app.schemas.suggestion_schema import SuggestionResponse
+from app.utils.id_generator import generate_uuid
+
+# Ask Gemini for JSON that follows suggestion_list_schema() (response_mime_type +
+# response_schema) instead of describing the format with an example in the prompt.
+# The output is always a parseable JSON array, the prompt is shorter and the
+# server-assigned fields below are not generated at all.
+AI_STRUCTURED_OUTPUT = os.getenv("AI_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+CATEGORY_IDS = [
+    "health",
+    "work",
+    "personal_growth",
+    "hobby",
+    "fitness",
+    "education",
+    "finance",
+    "social",
+    "spiritual",
+]
+
+# Fields the server sets after parsing, by schema model
+_SERVER_FIELDS: Dict[str, Set[str]] = {
+    "SuggestionResponse": {"id", "userId", "createdAt"},
+    "HabitResponse": {"userId"},
+    "HabitSeriesResponse": {"id", "userId", "habitId", "createdAt"},
+}
+
+
+@lru_cache(maxsize=None)
+def suggestion_list_schema() -> dict:
+    """
+    Gemini response schema for a list of suggestions, derived from SuggestionResponse.
+    Gemini takes an OpenAPI subset: no $ref or anyOf, so definitions are inlined and
+    optional fields become `nullable`.
+    """
+    json_schema = SuggestionResponse.model_json_schema(by_alias=True)
+    suggestion = _to_gemini_schema(json_schema, json_schema.get("$defs", {}))
+    category = suggestion["properties"]["habit"]["properties"]["category"]
+    category["properties"]["id"]["enum"] = CATEGORY_IDS
+    return {"type": "array", "items": suggestion}
+
+
+def fill_server_fields(item: dict) -> dict:
+    """Add the fields left out of suggestion_list_schema() to a generated suggestion."""
+    habit = item.get("habit")
+    if not habit:
+        return item
+    if not habit.get("id"):
+        habit["id"] = generate_uuid()  # new habit
+    habit.setdefault("userId", "")  # Set later in the service
+    series = habit.get("series")
+    if series:
+        series.setdefault("id", generate_uuid())
+        series.setdefault("userId", "")
+        series["habitId"] = habit["id"]
+    return item
+
+
+# ==========================================================
+# Helper Functions
+# ==========================================================
+
+
+def _to_gemini_schema(node: dict, defs: dict, model: Optional[str] = None) -> dict:
+    if "$ref" in node:
+        name = node["$ref"].rsplit("/", 1)[-1]
+        return _to_gemini_schema(defs[name], defs, name)
+
+    if "anyOf" in node:
+        options = [o for o in node["anyOf"] if o.get("type") != "null"]
+        schema = _to_gemini_schema(options[0], defs)
+        if len(options) < len(node["anyOf"]):
+            schema["nullable"] = True
+        return schema
+
+    schema = {key: node[key] for key in ("type", "format", "enum") if key in node}
+    if node.get("type") == "object":
+        model = model or node.get("title")
+        excluded = _SERVER_FIELDS.get(model, set())
+        schema["properties"] = {
+            name: _to_gemini_schema(prop, defs)
+            for name, prop in node.get("properties", {}).items()
+            if name not in excluded
+        }
+        schema["required"] = [
+            name for name in node.get("required", []) if name in schema["properties"]
+        ]
+    elif node.get("type") == "array":
+        schema["items"] = _to_gemini_schema(node["items"], defs)
+    return schema
@@ -0,0 +1,108 @@
+import os
+import re
+from typing import Dict, FrozenSet, List, Optional
+
+from app.schemas.habit_analysis_input_schema import HabitData
+from app.schemas.suggestion_schema import SuggestionResponse
+from app.services.rule_based_suggestions import MAX_IMPROVEMENTS
+
+# How suggestions from several AI chunks are consolidated into the top 5:
+#   local - maximal marginal relevance in-process (select_diverse_suggestions)
+#   ai    - another AI round with _refine_suggestions_prompt
+SUGGESTION_REFINE_MODE = os.getenv("SUGGESTION_REFINE_MODE", "local").lower()
+
+# MMR: lambda * relevance - (1 - lambda) * highest similarity to an already picked one
+MMR_LAMBDA = 0.6
+NEW_HABIT_RELEVANCE = 0.5  # relevance of a suggestion that doesn't improve a known habit
+CATEGORY_WEIGHT = 0.4  # similarity weights, sum to 1
+NAME_WEIGHT = 0.3
+TEXT_WEIGHT = 0.3
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class _Candidate:
+    def __init__(self, suggestion: SuggestionResponse, relevance: float):
+        habit = suggestion.habit
+        self.suggestion = suggestion
+        self.relevance = relevance
+        self.habit_id = habit.id if habit else None
+        self.category = habit.category.id if habit else None
+        self.name_words = _words(habit.name) if habit else frozenset()
+        self.text_words = _words(f"{suggestion.title} {suggestion.description}")
+
+
+def select_diverse_suggestions(
+    suggestions: List[SuggestionResponse],
+    habits: Optional[List[HabitData]] = None,
+    top_n: int = 5,
+) -> List[SuggestionResponse]:
+    """
+    Pick `top_n` suggestions that are relevant (improvements to the user's lowest
+    scoring habits first) and differ from each other in category, habit name and
+    text. At most MAX_IMPROVEMENTS suggestions improve existing habits, one per habit.
+    """
+    if len(suggestions) <= top_n:
+        return suggestions
+
+    scores = _habit_scores(habits or [])
+    remaining = [_Candidate(s, _relevance(s, scores)) for s in suggestions]
+    selected: List[_Candidate] = []
+    improvements = 0
+
+    while remaining and len(selected) < top_n:
+        best, best_value = None, None
+        for candidate in remaining:
+            if candidate.habit_id in scores and improvements >= MAX_IMPROVEMENTS:
+                continue
+            redundancy = max((_similarity(candidate, s) for s in selected), default=0.0)
+            value = MMR_LAMBDA * candidate.relevance - (1 - MMR_LAMBDA) * redundancy
+            if best_value is None or value > best_value:
+                best, best_value = candidate, value
+        if best is None:
+            break
+        selected.append(best)
+        remaining.remove(best)
+        improvements += best.habit_id in scores
+
+    return [c.suggestion for c in selected]
+
+
+# ==========================================================
+# Helper Functions
+# ==========================================================
+
+
+def _words(text: str) -> FrozenSet[str]:
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _habit_scores(habits: List[HabitData]) -> Dict[str, float]:
+    return {
+        h.id: h.performance_metric.score if h.performance_metric else 50.0
+        for h in habits
+    }
+
+
+def _relevance(suggestion: SuggestionResponse, scores: Dict[str, float]) -> float:
+    """0.5 for new habits, 0.5 - 1.0 for improvements, higher for lower scores."""
+    if suggestion.habit is None or suggestion.habit.id not in scores:
+        return NEW_HABIT_RELEVANCE
+    score = min(max(scores[suggestion.habit.id], 0.0), 100.0)
+    return NEW_HABIT_RELEVANCE + (1 - NEW_HABIT_RELEVANCE) * (100.0 - score) / 100.0
+
+
+def _similarity(a: _Candidate, b: _Candidate) -> float:
+    if a.habit_id is not None and a.habit_id == b.habit_id:
+        return 1.0
+    return (
+        CATEGORY_WEIGHT * (a.category is not None and a.category == b.category)
+        + NAME_WEIGHT * _jaccard(a.name_words, b.name_words)
+        + TEXT_WEIGHT * _jaccard(a.text_words, b.text_words)
+    )
@@ -1,28 +1,74 @@
-from typing import List, Optional
+import asyncio
+import contextvars
+import logging
+import os
+from typing import Dict, List, Optional, Set
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.database import SessionLocal
 from app.models.habit import Habit as HabitModel
 from app.models.category import Category
 from app.models.habit_series import HabitSeries as HabitSeriesModel
 from app.schemas.habit_analysis_input_schema import HabitAnalysisInput
 from app.schemas.suggestion_schema import SuggestionResponse
 from app.models.suggestion import Suggestion as SuggestionModel
-from app.services.ai_client import get_ai_suggestions
+from app.services.ai_client import AIBackendError, AISuggestions, get_ai_suggestions
+from app.services.ai_router import get_ai_router
+from app.services.habit_fingerprint import (
+    SUGGESTION_DELTA_ENABLED,
+    changed_habit_ids,
+    compute_fingerprints,
+    save_fingerprints,
+)
+from app.services.rule_based_suggestions import generate_rule_based_suggestions
+from app.services.suggestion_dedup import (
+    filter_duplicate_suggestions,
+    invalidate_dedup_index,
+)
+from app.services.suggestion_selector import select_diverse_suggestions
+from app.services.suggestion_snapshot import (
+    SUGGESTION_SNAPSHOTS_ENABLED,
+    get_fresh_snapshot,
+    get_latest_snapshot,
+    input_fingerprint,
+    save_snapshot,
+    snapshot_cutoff,
+)
+from app.utils.id_generator import generate_uuid
 from app.utils.sample_suggestions import get_sample_suggestions
+from app.utils.metrics import SUGGESTION_FALLBACKS
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ai:     AI (see ai_router) with DB / sample fallbacks
+# rules:  rule_based_suggestions only, no AI call
+# hybrid: answer with the rules right away, then generate AI suggestions in the
+#         background and save those (the rules answer if the AI fails)
+SUGGESTION_ENGINE = os.getenv("SUGGESTION_ENGINE", "ai").lower()
+
+# Keeps background generations referenced until they finish
+_background_tasks: Set[asyncio.Task] = set()
 
 
 async def generate_suggestions(
     habitAnalysisInput: HabitAnalysisInput,
-) -> List[SuggestionResponse]:
+    habit_ids: Optional[Set[str]] = None,
+) -> AISuggestions:
     """
     Generate suggestions using AI based on habits and metrics.
+    habit_ids limits the habits sent to the AI (all of them by default).
+    The result's `fallback` is set when a fallback AI backend answered: those
+    suggestions are canned and must not be stored as the user's AI suggestions.
     """
-    ai_suggestions = await get_ai_suggestions(habitAnalysisInput)
+    ai_suggestions = await get_ai_suggestions(
+        habitAnalysisInput, get_ai_router(), habit_ids=habit_ids
+    )
 
     user_id = habitAnalysisInput.user_id
 
-    for suggestion in ai_suggestions:
+    for suggestion in ai_suggestions.suggestions:
         suggestion.user_id = user_id
 
     return ai_suggestions
@@ -37,12 +83,24 @@ def save_suggestions(
     1. Create a new Habit from suggestion.habit.
     2. Create a new HabitSeries and link it to the Habit.
     3. Save the Suggestion with the new habit_id.
+    Near-duplicates of the user's existing suggestions are skipped (suggestion_dedup).
+    IDs are assigned up front, so everything is inserted in a single flush on commit.
     """
-    for suggestion in suggestions:
+    # Skip if no habit data; the others get the ID of their Suggestion row up front,
+    # which is what the dedup index keys them by
+    rows = [(generate_uuid(), s) for s in suggestions if s.habit]
+    with span("dedup"):
+        unique = filter_duplicate_suggestions(db, user_id, rows)
+    if len(unique) < len(rows):
+        logger.info(
+            "Skipped %d near-duplicate suggestions for user %s",
+            len(rows) - len(unique),
+            user_id,
+        )
+
+    for suggestion_id, suggestion in unique:
         # Extract habit data from suggestion and convert to dict
         habit_data = suggestion.habit
-        if not habit_data:
-            continue  # Skip if no habit data
 
         # Convert Pydantic model to dict
         habit_dict = habit_data.model_dump()
@@ -52,6 +110,7 @@ def save_suggestions(
 
         # 1. Create HabitModel first
         suggestion_habit = HabitModel(
+            id=generate_uuid(),
             name=habit_dict.get("name"),
             user_id=user_id,
             category_id=(
@@ -69,11 +128,11 @@ def save_suggestions(
         )
 
         db.add(suggestion_habit)
-        db.flush()  # Get the generated ID
 
         # 2. Create HabitSeries and link it to HabitModel (if series data exists)
         if series_data:
             habit_series = HabitSeriesModel(
+                id=generate_uuid(),
                 user_id=user_id,
                 habit_id=suggestion_habit.id,
                 start_date=series_data.get("startDate"),
@@ -81,14 +140,13 @@ def save_suggestions(
                 repeat_frequency=series_data.get("repeatFrequency"),
             )
             db.add(habit_series)
-            db.flush()  # Get the generated ID
 
             # Update habit with habit_series_id reference
             suggestion_habit.habit_series_id = habit_series.id
-            db.flush()
 
         # 3. Save the suggestion to the database
         db_suggestion = SuggestionModel(
+            id=suggestion_id,
             user_id=user_id,
             habit_id=suggestion_habit.id,
             title=suggestion.title,
@@ -99,7 +157,12 @@ def save_suggestions(
         db.add(db_suggestion)
 
     # Commit all changes at once
-    db.commit()
+    try:
+        db.commit()
+    except Exception:
+        # The index already holds the suggestions that weren't saved
+        invalidate_dedup_index(user_id)
+        raise
 
 
 async def generate_and_save_suggestions(
@@ -108,47 +171,253 @@ async def generate_and_save_suggestions(
 ) -> List[SuggestionResponse]:
     """
     Generate suggestions and save them to the database.
+    Habits must already carry their performance metrics.
     """
 
     user_id = habitAnalysisInput.user_id
     suggestions: List[SuggestionResponse] = []
+    new_suggestions: List[SuggestionResponse] = []
     generate_ai = False
 
+    if SUGGESTION_ENGINE in ("rules", "hybrid"):
+        with span("rules"):
+            suggestions = generate_rule_based_suggestions(habitAnalysisInput)
+        logger.info(
+            "Generated %d rule-based suggestions for user %s", len(suggestions), user_id
+        )
+
+        if SUGGESTION_ENGINE == "hybrid":
+            # Started from an empty context, so the background work isn't recorded
+            # in this request's trace (Server-Timing)
+            task = contextvars.Context().run(
+                asyncio.create_task,
+                _generate_and_save_in_background(habitAnalysisInput, suggestions),
+            )
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        else:
+            with span("save"):
+                save_suggestions(db, suggestions, user_id)
+        return suggestions
+
+    fingerprints = {}
+    use_fingerprints = SUGGESTION_DELTA_ENABLED or SUGGESTION_SNAPSHOTS_ENABLED
+    if use_fingerprints and habitAnalysisInput.habits:
+        with span("fingerprint"):
+            fingerprints = compute_fingerprints(habitAnalysisInput)
+
+    # Step 0a: Suggestions precomputed for exactly these habits (nightly or earlier run)
+    if SUGGESTION_SNAPSHOTS_ENABLED and fingerprints:
+        with span("snapshot"):
+            snapshot = get_fresh_snapshot(db, user_id, input_fingerprint(fingerprints))
+        if snapshot:
+            logger.info(
+                "Serving %d precomputed suggestions for user %s", len(snapshot), user_id
+            )
+            return snapshot
+
+    # Step 0b: Only habits that changed since the last AI run go to the AI
+    changed = None
+    if SUGGESTION_DELTA_ENABLED and fingerprints:
+        with span("delta"):
+            changed = changed_habit_ids(db, user_id, fingerprints)
+        if not changed:
+            # Nothing moved: the stored suggestions are still up to date, unless too old
+            stored = get_suggestion_by_user(db=db, user_id=user_id, limit=5)
+            newest = stored[0].created_at if stored else None
+            if newest is not None and newest >= snapshot_cutoff():
+                logger.info(
+                    "No habit changed for user %s, returning %d stored suggestions",
+                    user_id,
+                    len(stored),
+                )
+                return stored
+            changed = None
+        else:
+            logger.info(
+                "%d of %d habits changed for user %s",
+                len(changed),
+                len(habitAnalysisInput.habits),
+                user_id,
+            )
+
     try:
         # Step 1: Generate via AI
-        suggestions = await generate_suggestions(habitAnalysisInput)
-        generate_ai = True
-        print(f"Generated {len(suggestions)} suggestions via AI for user {user_id}")
+        with span("ai"):
+            ai_suggestions = await generate_suggestions(habitAnalysisInput, changed)
+        suggestions = ai_suggestions.suggestions
+        if ai_suggestions.fallback:
+            # Canned answer of a fallback backend: return it, but don't store it
+            SUGGESTION_FALLBACKS.labels(source="ai_fallback").inc()
+            logger.info(
+                "Fallback: %d suggestions from a fallback AI backend for user %s",
+                len(suggestions),
+                user_id,
+            )
+        else:
+            generate_ai = True
+            new_suggestions = suggestions
+            logger.info(
+                "Generated %d suggestions via AI for user %s", len(suggestions), user_id
+            )
+            if changed:
+                # Only the changed habits were sent, keep the others' suggestions
+                with span("merge"):
+                    suggestions = _merge_unchanged_suggestions(
+                        db, habitAnalysisInput, suggestions, changed
+                    )
 
     except Exception as e:
-        print(f"AI suggestion generation failed: {str(e)}")
+        logger.warning("AI suggestion generation failed: %s", e)
 
         # Step 2a: Fallback from DB (top 5, random order)
-        suggestions = get_suggestion_by_user(
-            db=db, user_id=user_id, limit=5, order_by="random"
-        )
+        with span("fallback_db"):
+            suggestions = get_suggestion_by_user(
+                db=db, user_id=user_id, limit=5, order_by="random"
+            )
 
         if suggestions:
-            print(
-                f"Fallback: Retrieved {len(suggestions)} suggestions from DB for user {user_id}"
+            SUGGESTION_FALLBACKS.labels(source="db").inc()
+            logger.info(
+                "Fallback: Retrieved %d suggestions from DB for user %s",
+                len(suggestions),
+                user_id,
             )
         else:
             # Step 2b: Fallback to sample suggestions
             sample_data = get_sample_suggestions(user_id=user_id, limit=5)
             suggestions = [SuggestionResponse(**s) for s in sample_data]
-            print(
-                f"Fallback: Retrieved {len(suggestions)} sample suggestions for user {user_id}"
+            SUGGESTION_FALLBACKS.labels(source="sample").inc()
+            logger.info(
+                "Fallback: Retrieved %d sample suggestions for user %s",
+                len(suggestions),
+                user_id,
             )
 
     # Step 3: Save suggestions to DB if AI-generated
     if generate_ai:
         # TODO: save_suggestions after have updated suggestion
-        save_suggestions(db, suggestions, user_id)
-        print(f"Saved {len(suggestions)} AI suggestions to DB for user {user_id}")
+        with span("save"):
+            # Only the new suggestions: the merged ones from earlier runs are stored already
+            _save_ai_suggestions(
+                db,
+                habitAnalysisInput,
+                new_suggestions,
+                fingerprints,
+                "interactive",
+                snapshot_suggestions=suggestions,
+            )
+        logger.info(
+            "Saved %d AI suggestions to DB for user %s", len(new_suggestions), user_id
+        )
+
+    return suggestions
+
 
+def has_fresh_snapshot(db: Session, habitAnalysisInput: HabitAnalysisInput) -> bool:
+    """Whether /suggestions/analyze would serve a snapshot for this input."""
+    fingerprint = input_fingerprint(compute_fingerprints(habitAnalysisInput))
+    return get_fresh_snapshot(db, habitAnalysisInput.user_id, fingerprint) is not None
+
+
+async def pregenerate_suggestions(
+    db: Session, habitAnalysisInput: HabitAnalysisInput
+) -> List[SuggestionResponse]:
+    """
+    Batch counterpart of generate_and_save_suggestions (scripts/pregenerate_suggestions.py):
+    generate AI suggestions for all habits and store them as the user's snapshot, so
+    the interactive path can serve them. AI errors are raised, there is no fallback.
+    """
+    fingerprints = compute_fingerprints(habitAnalysisInput)
+    ai_suggestions = await generate_suggestions(habitAnalysisInput)
+    if ai_suggestions.fallback:
+        raise AIBackendError("Only a fallback AI backend answered")
+    suggestions = ai_suggestions.suggestions
+    _save_ai_suggestions(db, habitAnalysisInput, suggestions, fingerprints, "nightly")
     return suggestions
 
 
+def _save_ai_suggestions(
+    db: Session,
+    habitAnalysisInput: HabitAnalysisInput,
+    suggestions: List[SuggestionResponse],
+    fingerprints: Dict[str, str],
+    source: str,
+    snapshot_suggestions: Optional[List[SuggestionResponse]] = None,
+) -> None:
+    """Save new suggestions; the snapshot gets `snapshot_suggestions` if given."""
+    user_id = habitAnalysisInput.user_id
+    save_suggestions(db, suggestions, user_id)
+    if fingerprints:
+        save_fingerprints(db, habitAnalysisInput, fingerprints)
+        if SUGGESTION_SNAPSHOTS_ENABLED:
+            save_snapshot(
+                db,
+                user_id,
+                input_fingerprint(fingerprints),
+                snapshot_suggestions or suggestions,
+                source,
+            )
+
+
+def _merge_unchanged_suggestions(
+    db: Session,
+    habitAnalysisInput: HabitAnalysisInput,
+    suggestions: List[SuggestionResponse],
+    changed: Set[str],
+) -> List[SuggestionResponse]:
+    """
+    Top 5 of the new suggestions and the last run's (its snapshot, which keeps the
+    AI's habit ids) except those for the changed habits and those older than
+    SUGGESTION_SNAPSHOT_MAX_AGE_HOURS, so none is carried forward forever.
+    """
+    previous = get_latest_snapshot(db, habitAnalysisInput.user_id) or []
+    cutoff = snapshot_cutoff()
+    kept = [
+        s
+        for s in previous
+        if not (s.habit and s.habit.id in changed)
+        and s.created_at is not None
+        and s.created_at >= cutoff
+    ]
+    if not kept:
+        return suggestions
+    return select_diverse_suggestions(suggestions + kept, habitAnalysisInput.habits)
+
+
+async def _generate_and_save_in_background(
+    habitAnalysisInput: HabitAnalysisInput,
+    rule_suggestions: List[SuggestionResponse],
+) -> None:
+    """Hybrid mode: save AI suggestions once ready, or the rules answer if the AI fails."""
+    user_id = habitAnalysisInput.user_id
+    try:
+        ai_suggestions = await generate_suggestions(habitAnalysisInput)
+        if ai_suggestions.fallback:
+            raise AIBackendError("Only a fallback AI backend answered")
+        suggestions = ai_suggestions.suggestions
+        logger.info(
+            "Generated %d background AI suggestions for user %s", len(suggestions), user_id
+        )
+    except Exception as e:
+        logger.warning("Background AI suggestion generation failed: %s", e)
+        suggestions = rule_suggestions
+
+    # Blocking DB work (dedup index, inserts), kept off the event loop
+    await asyncio.to_thread(_save_in_new_session, suggestions, user_id)
+
+
+def _save_in_new_session(suggestions: List[SuggestionResponse], user_id: str) -> None:
+    # The request's session is closed by now
+    db = SessionLocal()
+    try:
+        save_suggestions(db, suggestions, user_id)
+    except Exception:
+        logger.exception("Saving background suggestions failed for user %s", user_id)
+    finally:
+        db.close()
+
+
 def get_suggestion_by_user(
     db: Session,
     user_id: str,
@@ -0,0 +1,77 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.models.suggestion_snapshot import SuggestionSnapshot
+from app.schemas.suggestion_schema import SuggestionResponse
+
+# Every AI run (interactive or scripts/pregenerate_suggestions.py) stores its suggestions
+# as a snapshot. /suggestions/analyze serves the snapshot, without calling the AI, while
+# the user's habits still have the same fingerprints and it is younger than
+# SUGGESTION_SNAPSHOT_MAX_AGE_HOURS; otherwise suggestions are generated live.
+SUGGESTION_SNAPSHOTS_ENABLED = (
+    os.getenv("SUGGESTION_SNAPSHOTS_ENABLED", "true").lower() == "true"
+)
+# A little over a day, so nightly snapshots stay fresh until the next run
+SUGGESTION_SNAPSHOT_MAX_AGE_HOURS = float(
+    os.getenv("SUGGESTION_SNAPSHOT_MAX_AGE_HOURS", "30")
+)
+
+_suggestions_adapter = TypeAdapter(List[SuggestionResponse])
+
+
+def input_fingerprint(fingerprints: Dict[str, str]) -> str:
+    """One hash for all habit fingerprints (see habit_fingerprint)."""
+    joined = "|".join(f"{habit_id}={fp}" for habit_id, fp in sorted(fingerprints.items()))
+    return hashlib.sha256(joined.encode()).hexdigest()[:32]
+
+
+def get_fresh_snapshot(
+    db: Session, user_id: str, fingerprint: str
+) -> Optional[List[SuggestionResponse]]:
+    """The user's snapshot suggestions if they match `fingerprint` and aren't too old."""
+    snapshot = db.get(SuggestionSnapshot, user_id)
+    if snapshot is None or snapshot.fingerprint != fingerprint:
+        return None
+    if snapshot.generated_at < snapshot_cutoff():
+        return None
+    return _suggestions_adapter.validate_json(snapshot.suggestions)
+
+
+def snapshot_cutoff() -> datetime:
+    """Suggestions generated before this are too old to serve without the AI."""
+    return datetime.now() - timedelta(hours=SUGGESTION_SNAPSHOT_MAX_AGE_HOURS)
+
+
+def get_latest_snapshot(
+    db: Session, user_id: str
+) -> Optional[List[SuggestionResponse]]:
+    """The user's snapshot suggestions whatever their fingerprint and age."""
+    snapshot = db.get(SuggestionSnapshot, user_id)
+    if snapshot is None:
+        return None
+    return _suggestions_adapter.validate_json(snapshot.suggestions)
+
+
+def save_snapshot(
+    db: Session,
+    user_id: str,
+    fingerprint: str,
+    suggestions: List[SuggestionResponse],
+    source: str,
+) -> None:
+    snapshot = db.get(SuggestionSnapshot, user_id)
+    if snapshot is None:
+        snapshot = SuggestionSnapshot(user_id=user_id)
+        db.add(snapshot)
+    snapshot.fingerprint = fingerprint
+    snapshot.suggestions = _suggestions_adapter.dump_json(
+        suggestions, by_alias=True
+    ).decode()
+    snapshot.source = source
+    snapshot.generated_at = datetime.now()
+    db.commit()
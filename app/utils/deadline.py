@@ -0,0 +1,105 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Every HTTP request gets a deadline (DeadlineMiddleware). AI calls, their retries and
+# database statements made while handling it are cut off when it runs out, so a slow
+# dependency ends in the fallback path instead of a hanging request.
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "25"))  # 0 = none
+# Clients may ask for a different deadline with this header (seconds), up to the max
+REQUEST_DEADLINE_HEADER = os.getenv("REQUEST_DEADLINE_HEADER", "X-Request-Deadline")
+REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "60"))
+# Statement timeouts are re-sent when the time left shrank by more than this
+STATEMENT_TIMEOUT_STEP_MS = 100
+
+
+class Deadline:
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+# The deadline of the request being handled, None outside requests (scripts, the
+# background work of the hybrid engine). Copied into threadpool workers like the trace.
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+def start_deadline(seconds: Optional[float]) -> Optional[Deadline]:
+    """Set the deadline of the current context, no deadline if seconds is None or 0."""
+    deadline = Deadline(seconds) if seconds else None
+    _current_deadline.set(deadline)
+    return deadline
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def time_left(reserve: float = 0.0) -> Optional[float]:
+    """
+    Seconds until the current deadline minus `reserve` (kept for what comes after,
+    e.g. the fallback), never negative. None when there is no deadline.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline.remaining() - reserve)
+
+
+def deadline_seconds(header_value: Optional[str]) -> float:
+    """The request's deadline: the header's value if valid, else the default."""
+    if header_value:
+        try:
+            seconds = float(header_value)
+        except ValueError:
+            return REQUEST_DEADLINE_SECONDS
+        if seconds > 0:
+            return min(seconds, REQUEST_DEADLINE_MAX_SECONDS)
+    return REQUEST_DEADLINE_SECONDS
+
+
+def instrument_statements(engine: Engine, reserve: float = 0.0) -> None:
+    """
+    Limit every statement to the time left before the deadline minus `reserve`
+    (PostgreSQL statement_timeout, scoped to the transaction with SET LOCAL).
+    Statements run within the reserve, i.e. the fallback after the AI ran out of time,
+    are not limited. The timeout is only re-sent when it shrank by more than
+    STATEMENT_TIMEOUT_STEP_MS since it was last set on the transaction.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if conn.dialect.name != "postgresql":
+            return
+        current = conn.info.get("statement_timeout_ms")
+        remaining = time_left(reserve)
+        if remaining is None or remaining <= 0:
+            if current is not None:
+                cursor.execute("SET LOCAL statement_timeout TO DEFAULT")
+                conn.info.pop("statement_timeout_ms")
+            return
+        timeout_ms = max(1, int(remaining * 1000))
+        if current is None or current - timeout_ms > STATEMENT_TIMEOUT_STEP_MS:
+            cursor.execute(f"SET LOCAL statement_timeout = {timeout_ms}")
+            conn.info["statement_timeout_ms"] = timeout_ms
+
+    # SET LOCAL ends with the transaction
+    @event.listens_for(engine, "commit")
+    def _commit(conn):
+        conn.info.pop("statement_timeout_ms", None)
+
+    @event.listens_for(engine, "rollback")
+    def _rollback(conn):
+        conn.info.pop("statement_timeout_ms", None)
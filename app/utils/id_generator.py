@@ -1,4 +1,62 @@
+import os
+import secrets
+import threading
+import time
 import uuid
 
-def generate_uuid():
+# "uuid4" (random) or "uuid7" (time-ordered: new rows land on the right-most
+# B-tree page instead of a random one, avoiding page splits on large tables)
+ID_GENERATOR = os.getenv("ID_GENERATOR", "uuid4").lower()
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def generate_uuid4() -> str:
     return str(uuid.uuid4())
+
+
+def generate_uuid7() -> str:
+    """
+    UUIDv7 (RFC 9562): 48-bit Unix timestamp in ms, 12-bit counter, 62 random bits.
+    The counter keeps IDs strictly increasing within a process, even inside one millisecond.
+    """
+    global _uuid7_last_ms, _uuid7_counter
+
+    with _uuid7_lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _uuid7_last_ms:
+            _uuid7_last_ms = now_ms
+            # Random start leaves room to increment while staying unpredictable
+            _uuid7_counter = secrets.randbits(11)
+        else:
+            # Same millisecond (or clock moved back): keep ordering via the counter
+            _uuid7_counter += 1
+            if _uuid7_counter > 0xFFF:
+                _uuid7_last_ms += 1
+                _uuid7_counter = 0
+        timestamp_ms = _uuid7_last_ms
+        counter = _uuid7_counter
+
+    value = (timestamp_ms & 0xFFFFFFFFFFFF) << 80
+    value |= 0x7 << 76  # version
+    value |= counter << 64
+    value |= 0b10 << 62  # variant
+    value |= secrets.randbits(62)
+    return str(uuid.UUID(int=value))
+
+
+_GENERATORS = {
+    "uuid4": generate_uuid4,
+    "uuid7": generate_uuid7,
+}
+
+if ID_GENERATOR not in _GENERATORS:
+    raise ValueError(
+        f"❌ ERROR: ID_GENERATOR must be one of {list(_GENERATORS)}, got '{ID_GENERATOR}'."
+    )
+
+
+def generate_uuid():
+    return _GENERATORS[ID_GENERATOR]()
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+import orjson
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json or text
+# Upper bound for payloads (input models, suggestion lists) written to the log
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+# Items of a list payload that are serialized at all, the rest is only counted
+LOG_PAYLOAD_MAX_ITEMS = 5
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+def _json_default(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", by_alias=True)
+    return str(obj)
+
+
+class Payload:
+    """
+    A log argument that is only serialized when the record is actually emitted, and then
+    capped at max_chars. Lists are summarized by their first few items:
+
+        logger.debug("Generated suggestions: %s", Payload(suggestions))
+    """
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: int = LOG_PAYLOAD_MAX_CHARS) -> None:
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        value = self.value
+        prefix = ""
+        if isinstance(value, (list, tuple)) and len(value) > LOG_PAYLOAD_MAX_ITEMS:
+            prefix = f"({len(value)} items) "
+            value = value[:LOG_PAYLOAD_MAX_ITEMS]
+        text = orjson.dumps(value, default=_json_default).decode()
+        if len(text) > self.max_chars:
+            text = f"{text[:self.max_chars]}... ({len(text)} chars)"
+        return prefix + text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed via `extra=` become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=_json_default).decode()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Puts records on the queue as they are. The stock QueueHandler formats them first,
+    on the calling thread (Payload serialization included), and folds the traceback
+    into the message; here all formatting is left to the listener's handler.
+    Arguments are therefore formatted a little later, don't mutate them after logging.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging() -> None:
+    """
+    Configure the `app` logger. Records are put on a queue by the request handling code
+    and written to stdout by a background thread, so slow stdout never blocks a request.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(DeferredQueueHandler(log_queue))
+    # Written by the listener already, don't pass records on to root handlers as well
+    app_logger.propagate = False
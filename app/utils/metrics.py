@@ -0,0 +1,127 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# With several gunicorn workers each process only sees its own requests. Setting
+# PROMETHEUS_MULTIPROC_DIR (an empty, writable directory) makes every worker write its
+# metrics there and /metrics aggregate all of them (see gunicorn.conf.py).
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Buckets in seconds: fast cached reads up to multi-chunk AI generations
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+AI_LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+
+# Database connection pool
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Open database connections held by the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+
+# AI
+AI_REQUESTS = Counter(
+    "ai_requests_total", "Calls to the AI model", ["model", "outcome"]
+)
+AI_REQUEST_DURATION = Histogram(
+    "ai_request_duration_seconds",
+    "AI model call latency",
+    ["model"],
+    buckets=AI_LATENCY_BUCKETS,
+)
+AI_TOKENS = Counter(
+    "ai_tokens_total", "Tokens used by AI calls", ["model", "kind"]  # prompt / completion
+)
+AI_RETRIES = Counter(
+    "ai_retries_total", "AI calls retried after a failure", ["reason"]  # rate_limited / error
+)
+AI_CHUNK_FAILURES = Counter(
+    "ai_chunk_failures_total", "AI chunks left out of a result after all retries failed"
+)
+AI_REFINE_FAILURES = Counter(
+    "ai_refine_failures_total", "AI refine rounds that failed and were selected locally"
+)
+AI_PARSE_FAILURES = Counter(
+    "ai_parse_failures_total", "AI responses that were not valid suggestion JSON"
+)
+SUGGESTION_FALLBACKS = Counter(
+    "suggestion_fallbacks_total",
+    "Suggestion requests served without AI, by fallback source",
+    ["source"],  # db / sample / ai_fallback (a fallback AI backend answered)
+)
+SUGGESTION_DUPLICATES = Counter(
+    "suggestion_duplicates_total",
+    "Generated suggestions not saved as near-duplicates of the user's existing ones",
+)
+
+# Caches (hit ratio = hits / (hits + misses))
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups", ["cache", "result"]  # hit / miss
+)
+
+
+def record_ai_usage(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    AI_TOKENS.labels(model=model, kind="prompt").inc(prompt_tokens)
+    AI_TOKENS.labels(model=model, kind="completion").inc(completion_tokens)
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Track open and checked-out connections of the engine's pool."""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS.inc()
+
+    @event.listens_for(engine.pool, "close")
+    def _close(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS.dec()
+
+    @event.listens_for(engine.pool, "close_detached")
+    def _close_detached(dbapi_connection):
+        DB_POOL_CONNECTIONS.dec()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+def render_metrics() -> tuple:
+    """Return (body, content type) in the Prometheus text format."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,23 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def model_json_response(response_type: Any, content: Any, status_code: int = 200) -> Response:
+    """
+    Encode content straight to JSON bytes with pydantic-core (the model_dump_json path).
+
+    FastAPI would otherwise re-validate the value against response_model, dump it to a
+    dict and encode that dict again. Returning a Response skips all of that, so content
+    must already be instances of response_type (e.g. List[SuggestionResponse]).
+    Keep response_model on the route for the OpenAPI docs.
+    """
+    body = _type_adapter(response_type).dump_json(content, by_alias=True)
+    return Response(content=body, status_code=status_code, media_type="application/json")
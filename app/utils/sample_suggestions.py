@@ -3,6 +3,8 @@ from datetime import datetime
 import random
 from uuid import uuid4
 
+from app.utils.id_generator import generate_uuid
+
 
 def get_sample_suggestions(user_id: str, limit: int = 5):
     # Validate user_id
@@ -23,7 +25,7 @@ def get_sample_suggestions(user_id: str, limit: int = 5):
             s["habit"]["user_id"] = user_id
 
         # Optional: regenerate id and created_at if necessary
-        s["id"] = str(uuid4())
+        s["id"] = generate_uuid()
         s["created_at"] = datetime.now().isoformat()
 
         result.append(s)
@@ -0,0 +1,100 @@
+import enum
+import hashlib
+import mimetypes
+import os
+import posixpath
+import stat
+from functools import lru_cache
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.middleware.compression import parse_accept_encoding
+
+# Sidecar files written by scripts/precompress_static.py, in order of preference
+PRECOMPRESSED_EXTENSIONS = (("br", ".br"), ("gzip", ".gz"))
+
+# URLs carrying the content hash (?v=...) never change content, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))  # seconds, for unversioned URLs
+
+
+class ImageVariant(str, enum.Enum):
+    """Pre-generated image sizes, stored in a sub-directory named after the variant."""
+
+    THUMB = "thumb"
+    MEDIUM = "medium"
+
+
+@lru_cache(maxsize=1024)
+def _content_hash(path: str) -> Optional[str]:
+    # Static files only change on deploy, which restarts the process and clears this cache
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return None
+
+
+def versioned_static_url(
+    path: Optional[str], variant: Optional[ImageVariant] = None
+) -> Optional[str]:
+    """
+    Turn a stored path like 'static/images/plans/deep_work.png' into a content-hashed URL,
+    e.g. 'static/images/plans/thumb/deep_work.png?v=1a2b3c4d5e6f'.
+    Falls back to the original image if the variant wasn't generated, and returns the
+    path unchanged if the file doesn't exist.
+    """
+    if not path:
+        return path
+
+    if variant is not None:
+        directory, filename = posixpath.split(path)
+        variant_path = posixpath.join(directory, ImageVariant(variant).value, filename)
+        if os.path.isfile(variant_path):
+            path = variant_path
+
+    digest = _content_hash(path)
+    return f"{path}?v={digest}" if digest else path
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves `<file>.br` / `<file>.gz` next to `<file>` when the client
+    accepts that encoding, so nothing is compressed per request.
+    Content-hashed URLs (see versioned_static_url) are marked immutable.
+    """
+
+    def file_response(self, full_path, stat_result, scope: Scope) -> Response:
+        response = super().file_response(full_path, stat_result, scope)
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        if any(param.startswith("v=") for param in query_string.split("&")):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}"
+        return response
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            accepted = parse_accept_encoding(
+                Headers(scope=scope).get("accept-encoding", "")
+            )
+            for encoding, extension in PRECOMPRESSED_EXTENSIONS:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + extension
+                )
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                    response.headers["Content-Type"] = media_type
+                    response.headers["Content-Encoding"] = encoding
+                    response.headers.add_vary_header("Accept-Encoding")
+                    return response
+
+        return await super().get_response(path, scope)
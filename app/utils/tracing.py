@@ -0,0 +1,87 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestTrace:
+    """Durations of the named stages (spans) of one request."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []  # (name, duration in ms)
+
+    def record(self, name: str, duration_ms: float) -> None:
+        self.spans.append((name, duration_ms))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Spans grouped by name: total duration and number of occurrences."""
+        result: Dict[str, Dict[str, float]] = {}
+        for name, duration_ms in self.spans:
+            entry = result.setdefault(name, {"ms": 0.0, "count": 0})
+            entry["ms"] += duration_ms
+            entry["count"] += 1
+        return result
+
+
+# The trace of the request being handled. Copied into threadpool workers by
+# Starlette/anyio, so spans recorded in sync routes land in the same trace.
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar(
+    "request_trace", default=None
+)
+
+
+def start_trace() -> RequestTrace:
+    trace = RequestTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a stage of the current request:
+
+        with span("ai.generate"):
+            response = await async_generate_content(prompt, model)
+
+    Does nothing but measure time when no request is being traced (scripts, tests).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record(name, (time.perf_counter() - start) * 1000)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record the time spent in every SQL statement as a `db` span."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record("db", (time.perf_counter() - start) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # Failed statements never reach after_cursor_execute
+        if context.connection is not None and context.connection.info.get("query_start"):
+            context.connection.info["query_start"].pop()
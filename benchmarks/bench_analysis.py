@@ -0,0 +1,141 @@
+import os
+import sys
+import argparse
+import copy
+import json
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.schemas.habit_analysis_input_schema import HabitAnalysisInput
+from app.services.ai_client import _create_suggestion_prompt, _parse_ai_response
+from app.services.exception_summary import habit_for_prompt, summarize_exceptions
+from app.services.habit_selector import select_habits_for_prompt
+from app.services.habit_service import (
+    apply_exceptions,
+    calculate_performance_metrics,
+    compute_performance_metric,
+    generate_habit_instances,
+)
+from app.services.rule_based_suggestions import generate_rule_based_suggestions
+from app.services.suggestion_selector import select_diverse_suggestions
+from benchmarks.common import print_results, record_results, time_call
+from benchmarks.payloads import generate_ai_response_text, generate_habit_analysis_input
+
+# Micro-benchmarks of the /suggestions/analyze pipeline on synthetic payloads.
+# Each function is timed over the whole payload (all habits / all chunks), per size.
+# Results are appended to benchmarks/results/history.jsonl and compared with the
+# previous run of the same sizes.
+
+# python benchmarks/bench_analysis.py
+# python benchmarks/bench_analysis.py --sizes 10 100 1000 10000 --exceptions 10
+
+CHUNK_SIZE = 300  # Same as get_ai_suggestions
+SUGGESTIONS_PER_CHUNK = 5
+CHARS_PER_TOKEN = 4  # rough estimate for English / JSON
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--exceptions", type=int, default=5, help="Per habit")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-record", action="store_true", help="Don't save results")
+    return parser.parse_args()
+
+
+def tokens_per_habit(data: HabitAnalysisInput, summarize: bool) -> float:
+    """Estimated prompt tokens of the habit data, serialized as in the prompt."""
+    chars = sum(
+        len(json.dumps(habit_for_prompt(h, data.end_date, summarize), indent=2, default=str))
+        for h in data.habits
+    )
+    return chars / CHARS_PER_TOKEN / max(1, len(data.habits))
+
+
+def bench_size(habit_count: int, exceptions: int, repeat: int) -> dict:
+    data = HabitAnalysisInput(**generate_habit_analysis_input(habit_count, exceptions))
+    habits = data.habits
+    instances = [generate_habit_instances(h, data.end_date) for h in habits]
+    applied = [
+        apply_exceptions(copy.deepcopy(i), h.exceptions) for h, i in zip(habits, instances)
+    ]
+    chunk_starts = range(0, max(1, len(habits)), CHUNK_SIZE)
+    response_text = generate_ai_response_text(SUGGESTIONS_PER_CHUNK * len(chunk_starts))
+    with_metrics = calculate_performance_metrics(data)
+    parsed = _parse_ai_response(response_text)
+    selected, profile = select_habits_for_prompt(with_metrics, limit=10)
+    selected_input = with_metrics.model_copy(update={"habits": selected})
+
+    results = {
+        "generate_habit_instances": time_call(
+            lambda: [generate_habit_instances(h, data.end_date) for h in habits],
+            repeat=repeat,
+        ),
+        # apply_exceptions mutates the instances, so every round gets a fresh copy
+        "apply_exceptions": time_call(
+            lambda fresh: [apply_exceptions(i, h.exceptions) for h, i in zip(habits, fresh)],
+            setup=lambda: copy.deepcopy(instances),
+            repeat=repeat,
+        ),
+        "compute_performance_metric": time_call(
+            lambda: [compute_performance_metric(h, i) for h, i in zip(habits, applied)],
+            repeat=repeat,
+        ),
+        "_create_suggestion_prompt": time_call(
+            lambda: [_create_suggestion_prompt(data, i, CHUNK_SIZE) for i in chunk_starts],
+            repeat=repeat,
+        ),
+        "_parse_ai_response": time_call(
+            lambda: _parse_ai_response(response_text), repeat=repeat
+        ),
+        # Replaces the refine AI round when there are more than 5 suggestions
+        "select_diverse_suggestions": time_call(
+            lambda: select_diverse_suggestions(parsed, with_metrics.habits), repeat=repeat
+        ),
+        "generate_rule_based_suggestions": time_call(
+            lambda: generate_rule_based_suggestions(with_metrics), repeat=repeat
+        ),
+        "select_habits_for_prompt": time_call(
+            lambda: select_habits_for_prompt(with_metrics, limit=10), repeat=repeat
+        ),
+        "summarize_exceptions": time_call(
+            lambda: [summarize_exceptions(h.exceptions, data.end_date) for h in habits],
+            repeat=repeat,
+        ),
+        "habit_tokens": {
+            "raw_exceptions": tokens_per_habit(with_metrics, summarize=False),
+            "summarized": tokens_per_habit(with_metrics, summarize=True),
+        },
+        # What is sent to the AI: every habit in chunks vs the selected habits + profile
+        "prompt_chars": {
+            "chunked": sum(
+                len(_create_suggestion_prompt(with_metrics, i, CHUNK_SIZE))
+                for i in chunk_starts
+            ),
+            "selected": len(
+                _create_suggestion_prompt(selected_input, 0, len(selected), profile=profile)
+            ),
+            "prompts_chunked": len(chunk_starts),
+        },
+    }
+    return results
+
+
+def main():
+    args = parse_args()
+    for size in args.sizes:
+        print(f"📊 {size} habits, {args.exceptions} exceptions each")
+        results = bench_size(size, args.exceptions, args.repeat)
+        previous = None
+        if not args.no_record:
+            previous = record_results(
+                "analysis", {"habits": size, "exceptions": args.exceptions}, results
+            )
+        print_results(results, previous)
+
+
+if __name__ == "__main__":
+    main()
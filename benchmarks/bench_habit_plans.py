@@ -0,0 +1,172 @@
+import os
+import sys
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app.
+# app.database requires DATABASE_URL at import time; the benchmark uses its own engine.
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import *  # noqa: F401,F403 - register all tables on Base.metadata
+from app.models.habit import Habit, TrackingType
+from app.models.habit_plan import HabitPlan, HabitPlanSuggestion
+from app.models.habit_series import HabitSeries
+from app.models.suggestion import Suggestion
+from app.models.user import User
+from app.models.category import Category
+from app.services import habit_plan_service
+
+# Compare the previous joinedload habit-plan query with the selectin-based one:
+# rows fetched from the database, number of statements and latency per page.
+
+# In-memory SQLite (default)
+# python benchmarks/bench_habit_plans.py --plans 1000 --suggestions 20
+
+# Against a scratch PostgreSQL database (tables are created and filled!)
+# python benchmarks/bench_habit_plans.py --database-url postgresql://.../lfl_bench
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark habit plan queries.")
+    parser.add_argument("--plans", type=int, default=1000)
+    parser.add_argument("--suggestions", type=int, default=20, help="Per plan")
+    parser.add_argument("--limit", type=int, default=100, help="Page size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default="sqlite://")
+    return parser.parse_args()
+
+
+def seed(session, plan_count: int, suggestions_per_plan: int):
+    session.add(User(id="bench_user", name="Bench User"))
+    categories = [
+        Category(id=f"bench_cat_{i}", name=f"Category {i}", color_hex="#FF5733")
+        for i in range(10)
+    ]
+    session.add_all(categories)
+
+    for p in range(plan_count):
+        category_id = categories[p % len(categories)].id
+        session.add(
+            HabitPlan(
+                id=f"plan_{p:05d}",
+                title=f"Plan {p}",
+                description="A long plan description. " * 10,
+                category_id=category_id,
+                image_path="static/images/plans/deep_work.png",
+            )
+        )
+        for s in range(suggestions_per_plan):
+            key = f"{p:05d}_{s:02d}"
+            session.add_all(
+                [
+                    Habit(
+                        id=f"habit_{key}",
+                        name=f"Habit {key}",
+                        user_id="bench_user",
+                        category_id=category_id,
+                        date=datetime(2025, 1, 1),
+                        habit_series_id=f"series_{key}",
+                        tracking_type=TrackingType.COMPLETE,
+                    ),
+                    HabitSeries(
+                        id=f"series_{key}",
+                        user_id="bench_user",
+                        habit_id=f"habit_{key}",
+                        start_date=datetime(2025, 1, 1),
+                    ),
+                    Suggestion(
+                        id=f"sugg_{key}",
+                        title=f"Suggestion {key}",
+                        description="Try this every morning to build momentum. " * 3,
+                        user_id="bench_user",
+                        habit_id=f"habit_{key}",
+                        created_at=datetime(2025, 1, 1),
+                    ),
+                    HabitPlanSuggestion(
+                        habit_plan_id=f"plan_{p:05d}", suggestion_id=f"sugg_{key}"
+                    ),
+                ]
+            )
+    session.commit()
+
+
+def legacy_query(session, skip: int, limit: int):
+    """The query get_habit_plans used before switching to selectinload."""
+    return (
+        session.query(HabitPlan)
+        .options(joinedload(HabitPlan.category))
+        .options(joinedload(HabitPlan.suggestions).joinedload(Suggestion.habit))
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def current_query(session, skip: int, limit: int):
+    return habit_plan_service._habit_plan_query(session).offset(skip).limit(limit).all()
+
+
+def run(engine, Session, name, query, limit, repeat):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    timings = []
+    for _ in range(repeat):
+        statements.clear()
+        session = Session()
+        event.listen(engine, "before_cursor_execute", capture)
+        start = time.perf_counter()
+        plans = query(session, 0, limit)
+        # Validation touches every lazy relationship that wasn't loaded up front
+        habit_plan_service._validate_plans(plans)
+        timings.append(time.perf_counter() - start)
+        event.remove(engine, "before_cursor_execute", capture)
+        session.close()
+
+    # Re-run the captured statements of the last iteration to count fetched rows
+    with engine.connect() as conn:
+        raw = conn.connection.cursor()
+        rows = 0
+        for statement, parameters in statements:
+            raw.execute(statement, parameters)
+            rows += len(raw.fetchall())
+        raw.close()
+
+    best = min(timings) * 1000
+    print(
+        f"{name:<28} rows={rows:>7,}  statements={len(statements):>4}  "
+        f"best={best:8.1f} ms  avg={sum(timings) / len(timings) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    args = parse_args()
+    engine_kwargs = {}
+    if args.database_url.startswith("sqlite"):
+        engine_kwargs = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    engine = create_engine(args.database_url, **engine_kwargs)
+    Session = sessionmaker(bind=engine)
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Seeding {args.plans:,} plans x {args.suggestions} suggestions...")
+    session = Session()
+    seed(session, args.plans, args.suggestions)
+    session.close()
+
+    print(f"\n### First page (limit={args.limit}), best of {args.repeat}")
+    run(engine, Session, "joinedload (previous)", legacy_query, args.limit, args.repeat)
+    run(engine, Session, "selectinload (current)", current_query, args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.utils.id_generator import generate_uuid4, generate_uuid7
+
+# Compare uuid4 and uuid7 IDs: generation speed and, on PostgreSQL, insert
+# throughput and primary-key index size for a table shaped like `suggestions`.
+
+# Generation only (no database needed)
+# python benchmarks/bench_id_generator.py
+
+# Generation + insert benchmark against DATABASE_URL (uses temporary tables)
+# python benchmarks/bench_id_generator.py --rows 500000 --with-db
+
+GENERATORS = {"uuid4": generate_uuid4, "uuid7": generate_uuid7}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ID generators.")
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows per run")
+    parser.add_argument(
+        "--batch-size", type=int, default=5_000, help="Rows per INSERT batch"
+    )
+    parser.add_argument(
+        "--with-db", action="store_true", help="Also benchmark inserts on PostgreSQL"
+    )
+    return parser.parse_args()
+
+
+def bench_generation(rows: int):
+    print(f"\n### ID generation ({rows:,} IDs)")
+    for name, generator in GENERATORS.items():
+        start = time.perf_counter()
+        for _ in range(rows):
+            generator()
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {rows / elapsed:,.0f} IDs/s ({elapsed * 1e9 / rows:.0f} ns/ID)")
+
+
+def bench_inserts(rows: int, batch_size: int):
+    # Imported lazily so generation benchmarks run without a database
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    if engine.dialect.name != "postgresql":
+        print("Insert benchmark requires PostgreSQL, skipping.")
+        return
+
+    print(f"\n### Inserts ({rows:,} rows, batches of {batch_size:,})")
+    with engine.connect() as conn:
+        has_pgstattuple = bool(
+            conn.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'")
+            ).scalar()
+        )
+
+        for name, generator in GENERATORS.items():
+            table = f"bench_ids_{name}"
+            conn.execute(
+                text(
+                    f"CREATE TEMP TABLE {table} "
+                    "(id VARCHAR PRIMARY KEY, user_id VARCHAR, title VARCHAR)"
+                )
+            )
+            conn.commit()
+
+            start = time.perf_counter()
+            for offset in range(0, rows, batch_size):
+                batch = [
+                    {"id": generator(), "user_id": "user_1", "title": "Drink Water"}
+                    for _ in range(min(batch_size, rows - offset))
+                ]
+                conn.execute(
+                    text(
+                        f"INSERT INTO {table} (id, user_id, title) "
+                        "VALUES (:id, :user_id, :title)"
+                    ),
+                    batch,
+                )
+                conn.commit()
+            elapsed = time.perf_counter() - start
+
+            index_bytes = conn.execute(
+                text(f"SELECT pg_relation_size('{table}_pkey')")
+            ).scalar()
+            line = (
+                f"{name}: {rows / elapsed:,.0f} rows/s, "
+                f"pkey index {index_bytes / 1024 / 1024:.1f} MiB"
+            )
+            if has_pgstattuple:
+                density = conn.execute(
+                    text(f"SELECT avg_leaf_density FROM pgstatindex('{table}_pkey')")
+                ).scalar()
+                line += f", leaf density {density:.1f}%"
+            print(line)
+
+            conn.execute(text(f"DROP TABLE {table}"))
+            conn.commit()
+
+        if not has_pgstattuple:
+            print("(CREATE EXTENSION pgstattuple; to also report index leaf density)")
+
+
+def main():
+    args = parse_args()
+    bench_generation(args.rows)
+    if args.with_db:
+        bench_inserts(args.rows, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import argparse
+import json
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.schemas.habit_plan_schema import HabitPlanResponse
+from app.schemas.performance_metric_schema import PerformanceMetricResponse
+from app.schemas.suggestion_schema import SuggestionResponse
+from app.utils.sample_suggestions import get_sample_suggestions
+
+# Per-endpoint encode time of a response_model payload:
+#   stdlib json  - FastAPI default: validate + dump to dict + json.dumps (JSONResponse)
+#   orjson       - same, encoded with orjson (ORJSONResponse, the app default now)
+#   dump_json    - pydantic-core straight to bytes (model_json_response)
+# python benchmarks/bench_serialization.py --size 100
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark response encoding.")
+    parser.add_argument("--size", type=int, default=100, help="Items per payload")
+    parser.add_argument("--number", type=int, default=200, help="Encodes per timing")
+    return parser.parse_args()
+
+
+def build_suggestions(size: int) -> List[SuggestionResponse]:
+    suggestions = []
+    while len(suggestions) < size:
+        suggestions.extend(
+            SuggestionResponse(**s) for s in get_sample_suggestions("bench_user", limit=10)
+        )
+    return suggestions[:size]
+
+
+def build_habit_plans(size: int) -> List[HabitPlanResponse]:
+    suggestions = build_suggestions(5)
+    return [
+        HabitPlanResponse(
+            id=f"plan_{i}",
+            title=f"Plan {i}",
+            description="## Introduction\n\nA long markdown description. " * 20,
+            image_path="static/images/plans/deep_work.png",
+            category=suggestions[0].habit.category,
+            suggestions=suggestions,
+        )
+        for i in range(size)
+    ]
+
+
+def build_metrics(size: int) -> List[PerformanceMetricResponse]:
+    return [
+        PerformanceMetricResponse(
+            id=f"metric_{i}",
+            habit_id=f"habit_{i}",
+            score=42.5,
+            completion_rate=42.5,
+            average_progress=None,
+            total_progress=17,
+            description="Needs more consistency in 'Morning Jog', only reaching 42.5%.",
+            created_at=datetime.now(),
+        )
+        for i in range(size)
+    ]
+
+
+def encoders(response_type):
+    adapter = TypeAdapter(response_type)
+
+    def fastapi_dict(content):
+        # What fastapi.routing.serialize_response does with a pydantic v2 response_model
+        value = adapter.validate_python(content, from_attributes=True)
+        return adapter.dump_python(value, mode="json", by_alias=True)
+
+    return {
+        "stdlib json": lambda c: JSONResponse(fastapi_dict(c)).body,
+        "orjson": lambda c: ORJSONResponse(fastapi_dict(c)).body,
+        "dump_json": lambda c: adapter.dump_json(c, by_alias=True),
+    }
+
+
+def main():
+    args = parse_args()
+    endpoints = [
+        ("GET /suggestions", List[SuggestionResponse], build_suggestions(args.size)),
+        ("POST /suggestions/analyze", List[SuggestionResponse], build_suggestions(5)),
+        ("GET /habit-plans", List[HabitPlanResponse], build_habit_plans(args.size)),
+        ("POST /habits/metrics", List[PerformanceMetricResponse], build_metrics(args.size)),
+    ]
+
+    for name, response_type, content in endpoints:
+        print(f"\n### {name} ({len(content)} items)")
+        results = {}
+        baseline = None
+        for label, encode in encoders(response_type).items():
+            body = encode(content)
+            results[label] = body
+            seconds = min(timeit.repeat(lambda: encode(content), number=args.number, repeat=3))
+            per_call = seconds / args.number * 1e6
+            baseline = baseline or per_call
+            print(
+                f"{label:<12} {per_call:10.1f} µs  {len(body) / 1024:8.1f} KiB  "
+                f"x{baseline / per_call:.1f}"
+            )
+        # All encoders must produce the same document
+        documents = {label: json.dumps(orjson.loads(b), sort_keys=True) for label, b in results.items()}
+        assert len(set(documents.values())) == 1, f"{name}: encoders disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+import sys
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.schemas.habit_analysis_input_schema import HabitAnalysisInput
+from app.services.ai_client import (
+    FakeAIBackend,
+    _create_suggestion_prompt,
+    _parse_ai_response,
+)
+from app.services.habit_selector import select_habits_for_prompt
+from app.services.habit_service import calculate_performance_metrics
+from app.services.suggestion_output_schema import suggestion_list_schema
+from benchmarks.common import percentiles, print_results, record_results
+from benchmarks.payloads import generate_habit_analysis_input
+
+# Free-text JSON (output format example in the prompt, fenced answer) vs structured
+# output (response schema, short prompt) against the local FakeAIBackend: prompt and
+# completion tokens, latency and parse failure rate per AI call.
+# The fake backend generates in time proportional to its completion tokens
+# (--seconds-per-1k-tokens) and cuts off --malformed-rate of the free-text answers,
+# so the latency and failure numbers follow those settings; the token counts come
+# from the actual prompts and answers.
+
+# python benchmarks/bench_structured_output.py
+# python benchmarks/bench_structured_output.py --calls 200 --malformed-rate 0.05
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark structured AI output.")
+    parser.add_argument("--habits", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=50, help="AI calls per mode")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per call")
+    parser.add_argument("--seconds-per-1k-tokens", type=float, default=2.0)
+    parser.add_argument(
+        "--malformed-rate", type=float, default=0.05, help="Share of broken free-text answers"
+    )
+    parser.add_argument("--no-record", action="store_true", help="Don't save results")
+    return parser.parse_args()
+
+
+async def bench_mode(args, prompt: str, response_schema) -> dict:
+    backend = FakeAIBackend(
+        latency=args.latency,
+        latency_jitter=0.0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        malformed_rate=args.malformed_rate,
+        seconds_per_1k_tokens=args.seconds_per_1k_tokens,
+        seed=42,
+    )
+
+    async def call():
+        start = time.perf_counter()
+        response = await backend.generate(prompt, response_schema)
+        suggestions = _parse_ai_response(response.text)
+        return (time.perf_counter() - start) * 1000, response, suggestions
+
+    calls = await asyncio.gather(*(call() for _ in range(args.calls)))
+    latencies = [latency for latency, _, _ in calls]
+    return {
+        "prompt_tokens": statistics.mean(r.prompt_tokens for _, r, _ in calls),
+        "completion_tokens": statistics.mean(r.completion_tokens for _, r, _ in calls),
+        **{f"{k}_ms": v for k, v in percentiles(latencies).items()},
+        "parse_failure_rate": sum(1 for _, _, s in calls if not s) / len(calls),
+    }
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)  # a warning per malformed answer
+    data = calculate_performance_metrics(
+        HabitAnalysisInput(**generate_habit_analysis_input(args.habits))
+    )
+    selected, profile = select_habits_for_prompt(data)
+    selected_input = data.model_copy(update={"habits": selected})
+
+    results = {}
+    for mode, structured in (("free_text", False), ("structured", True)):
+        prompt = _create_suggestion_prompt(
+            selected_input, 0, len(selected), profile=profile, structured_output=structured
+        )
+        schema = suggestion_list_schema() if structured else None
+        print(f"🤖 {mode}: {args.calls} calls, {len(prompt)} prompt chars")
+        results[mode] = asyncio.run(bench_mode(args, prompt, schema))
+
+    previous = None
+    if not args.no_record:
+        params = {
+            "habits": args.habits,
+            "calls": args.calls,
+            "latency": args.latency,
+            "seconds_per_1k_tokens": args.seconds_per_1k_tokens,
+            "malformed_rate": args.malformed_rate,
+        }
+        previous = record_results("structured_output", params, results)
+    print_results(results, previous, key="p50_ms")
+
+
+if __name__ == "__main__":
+    main()
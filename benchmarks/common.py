@@ -0,0 +1,118 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Shared helpers for the benchmark scripts: timing, percentiles and a JSONL history of
+# results, so a run can be compared with the previous run of the same benchmark.
+
+PROJECT_ROOT = Path(__file__).parent.parent
+RESULTS_FILE = PROJECT_ROOT / "benchmarks" / "results" / "history.jsonl"
+
+
+def time_call(
+    fn: Callable, setup: Optional[Callable] = None, repeat: int = 5, number: int = 1
+) -> Dict[str, float]:
+    """
+    Run fn `number` times per round, `repeat` rounds, and return per-call timings in ms.
+    If setup is given, it is called before every round (untimed) and its return value is
+    passed to fn, e.g. for functions that mutate their input.
+    """
+    rounds = []
+    for _ in range(repeat):
+        args = setup() if setup is not None else None
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(args) if setup is not None else fn()
+        rounds.append((time.perf_counter() - start) * 1000 / number)
+    return {
+        "min_ms": min(rounds),
+        "median_ms": statistics.median(rounds),
+        "max_ms": max(rounds),
+    }
+
+
+def percentiles(samples: List[float], points=(50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles, e.g. {"p50": ..., "p95": ..., "p99": ...}."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {f"p{p}": 0.0 for p in points}
+    return {
+        f"p{p}": ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+        for p in points
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_history(results_file: Path = RESULTS_FILE) -> List[dict]:
+    if not results_file.exists():
+        return []
+    with open(results_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_results(
+    benchmark: str,
+    params: dict,
+    results: Dict[str, dict],
+    results_file: Path = RESULTS_FILE,
+) -> Optional[dict]:
+    """
+    Append a run to the history file and return the previous run of the same benchmark
+    with the same params (None if there is none).
+    """
+    previous = None
+    for entry in load_history(results_file):
+        if entry["benchmark"] == benchmark and entry["params"] == params:
+            previous = entry
+
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_file, "a") as f:
+        f.write(
+            json.dumps(
+                {
+                    "benchmark": benchmark,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "revision": git_revision(),
+                    "python": platform.python_version(),
+                    "params": params,
+                    "results": results,
+                }
+            )
+            + "\n"
+        )
+    return previous
+
+
+def print_results(
+    results: Dict[str, dict], previous: Optional[dict] = None, key: str = "median_ms"
+) -> None:
+    """Print one line per result, with the change against the previous run if any."""
+    previous_results = previous["results"] if previous else {}
+    width = max((len(name) for name in results), default=0)
+    for name, values in results.items():
+        line = f"  {name:<{width}}  " + "  ".join(
+            f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+            for k, v in values.items()
+        )
+        before = previous_results.get(name, {}).get(key)
+        if before:
+            change = (values[key] - before) / before * 100
+            line += f"  ({change:+.1f}% vs {previous['revision']})"
+        print(line)
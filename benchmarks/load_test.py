@@ -0,0 +1,175 @@
+import os
+import sys
+import argparse
+import asyncio
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.common import PROJECT_ROOT, percentiles, print_results, record_results
+from benchmarks.payloads import generate_habit_analysis_input
+
+# Concurrent load test of the API with httpx.
+#
+# By default the app runs in-process (no server needed) on a SQLite file, with Gemini
+# replaced by the fake AI backend (--ai-latency, --ai-error-rate, --ai-rate-limit-rate),
+# so the numbers show the app's own overhead, how it behaves while waiting on the AI and
+# how the fallbacks hold up when the AI fails.
+# Pass --database-url to use a local PostgreSQL instead (tables are created!), or --url
+# to load an already running server (which then calls whatever AI it is configured with).
+
+# python benchmarks/load_test.py --endpoint analyze --habits 100 --requests 200 --concurrency 20
+# python benchmarks/load_test.py --endpoint habit-plans --requests 2000 --concurrency 50 --seed
+# python benchmarks/load_test.py --endpoint analyze --ai-error-rate 0.3 --ai-rate-limit-rate 0.1
+# python benchmarks/load_test.py --url http://localhost:8000 --endpoint suggestions
+
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+DEFAULT_DATABASE_URL = f"sqlite:///{RESULTS_DIR / 'load_test.db'}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the API.")
+    parser.add_argument(
+        "--endpoint", choices=["analyze", "habit-plans", "suggestions"], default="analyze"
+    )
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--habits", type=int, default=50, help="Habits per analyze request")
+    parser.add_argument("--exceptions", type=int, default=5, help="Per habit")
+    parser.add_argument(
+        "--ai-latency", type=float, default=1.0, help="Seconds the fake AI call takes"
+    )
+    parser.add_argument("--ai-error-rate", type=float, default=0.0, help="0.0 - 1.0")
+    parser.add_argument("--ai-rate-limit-rate", type=float, default=0.0, help="0.0 - 1.0")
+    parser.add_argument(
+        "--chunk-delay",
+        type=float,
+        default=0.0,
+        help="AI_CHUNK_DELAY_SECONDS for the in-process app (production default: 2)",
+    )
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--seed", action="store_true", help="Load scripts/setup_database data")
+    parser.add_argument("--url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--no-record", action="store_true", help="Don't save results")
+    return parser.parse_args()
+
+
+def build_in_process_app(args):
+    """Import the app against the benchmark database, with the fake AI backend."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["AI_CHUNK_DELAY_SECONDS"] = str(args.chunk_delay)
+    os.environ.setdefault("LOG_LEVEL", "warning")
+
+    from app.main import app
+    from app.services.ai_client import FakeAIBackend
+    from app.services.ai_router import AIRouter, set_ai_router
+
+    router = AIRouter()
+    router.register(
+        FakeAIBackend(
+            latency=args.ai_latency,
+            latency_jitter=0.0,
+            error_rate=args.ai_error_rate,
+            rate_limit_rate=args.ai_rate_limit_rate,
+            seed=42,
+        )
+    )
+    set_ai_router(router)
+
+    if args.seed:
+        sys.path.append(str(PROJECT_ROOT / "scripts"))
+        import setup_database
+
+        setup_database.create_test_data()
+    return app
+
+
+def build_request(args, index: int) -> dict:
+    if args.endpoint == "analyze":
+        payload = generate_habit_analysis_input(
+            args.habits, args.exceptions, user_id=f"load_user_{index % 20}", seed=index % 20
+        )
+        return {"method": "POST", "url": "/suggestions/analyze", "json": payload}
+    if args.endpoint == "habit-plans":
+        return {"method": "GET", "url": "/habit-plans/"}
+    return {"method": "GET", "url": "/suggestions/", "params": {"user_id": "user_1"}}
+
+
+async def run_load(client, args) -> dict:
+    # Bodies are built up front so payload generation isn't part of the latency
+    requests = [build_request(args, i) for i in range(args.requests)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    latencies = []
+    statuses: Counter = Counter()
+
+    async def worker():
+        while not queue.empty():
+            request = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                statuses[str(response.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "latency_ms": {
+            **percentiles(latencies),
+            "max": max(latencies),
+            "mean": sum(latencies) / len(latencies),
+        },
+        "throughput": {"requests_per_s": len(latencies) / elapsed, "total_s": elapsed},
+        "status": dict(statuses),
+    }
+
+
+async def main_async(args):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=300)
+    else:
+        app = build_in_process_app(args)
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=300
+        )
+    async with client:
+        return await run_load(client, args)
+
+
+def main():
+    args = parse_args()
+    target = args.url or f"in-process app (fake AI {args.ai_latency}s)"
+    print(f"🚀 {args.requests} x {args.endpoint}, concurrency {args.concurrency}, {target}")
+    results = asyncio.run(main_async(args))
+
+    previous = None
+    if not args.no_record:
+        params = {
+            "endpoint": args.endpoint,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "habits": args.habits,
+            "ai_latency": args.ai_latency,
+            "ai_error_rate": args.ai_error_rate,
+            "ai_rate_limit_rate": args.ai_rate_limit_rate,
+            "target": "url" if args.url else "in-process",
+        }
+        previous = record_results("load_test", params, results)
+    print_results(results, previous, key="p95")
+
+
+if __name__ == "__main__":
+    main()
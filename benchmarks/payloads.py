@@ -0,0 +1,175 @@
+import sys
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+# Synthetic /suggestions/analyze payloads in the shape of habit_analysis_input.json,
+# from a handful of habits to 10,000, plus canned AI responses for _parse_ai_response.
+# Generation is seeded, so the same arguments always give the same payload.
+
+# python benchmarks/payloads.py --habits 1000 --output /tmp/habits_1000.json
+# python benchmarks/payloads.py --habits 10000 --exceptions 10 --output /tmp/habits_10000.json
+
+CATEGORIES = [
+    ("health", "Health", "#FF5733"),
+    ("work", "Work", "#3498DB"),
+    ("personal_growth", "Personal Growth", "#9B59B6"),
+    ("hobby", "Hobby", "#F1C40F"),
+    ("fitness", "Fitness", "#E74C3C"),
+    ("education", "Education", "#2ECC71"),
+    ("finance", "Finance", "#1ABC9C"),
+    ("social", "Social", "#E67E22"),
+    ("spiritual", "Spiritual", "#34495E"),
+]
+
+HABIT_NAMES = [
+    "Morning Jog",
+    "Drink Water",
+    "Read a Book",
+    "Meditate",
+    "Daily Budgeting",
+    "Learn a Language",
+    "Call a Friend",
+    "Stretching",
+    "Journal",
+    "Deep Work Session",
+]
+
+UNITS = ["minutes", "pages", "cups", "sessions", "steps"]
+FREQUENCIES = ["daily", "weekly", "monthly"]
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def generate_habit_analysis_input(
+    habit_count: int,
+    exceptions_per_habit: int = 5,
+    days: int = 59,
+    user_id: str = "bench_user",
+    seed: int = 42,
+) -> dict:
+    """Build a HabitAnalysisInput-shaped dict with habit_count habits."""
+    rng = random.Random(seed)
+    start_date = datetime(2025, 2, 1, tzinfo=timezone.utc)
+    end_date = start_date + timedelta(days=days, hours=23, minutes=59, seconds=59)
+
+    habits = []
+    for h in range(habit_count):
+        category_id, category_name, color_hex = rng.choice(CATEGORIES)
+        tracking_type = rng.choice(["complete", "progress"])
+        habit_start = start_date + timedelta(days=rng.randrange(0, max(1, days // 2)))
+        series_id = f"series_{h:05d}"
+
+        exceptions = []
+        for e in range(exceptions_per_habit):
+            exceptions.append(
+                {
+                    "id": f"exception_{h:05d}_{e:03d}",
+                    "habit_series_id": series_id,
+                    "date": _iso(habit_start + timedelta(days=rng.randrange(0, days))),
+                    "is_skipped": rng.random() < 0.2,
+                    "reminder_enabled": rng.random() < 0.5,
+                    "target_value": rng.randint(1, 60) if tracking_type == "progress" else None,
+                    "current_value": rng.randint(0, 60) if tracking_type == "progress" else None,
+                    "is_completed": rng.random() < 0.7,
+                }
+            )
+
+        habits.append(
+            {
+                "id": f"habit_{h:05d}",
+                "name": rng.choice(HABIT_NAMES),
+                "category": {
+                    "id": category_id,
+                    "name": category_name,
+                    "icon_path": f"assets/icons/{category_id}.png",
+                    "color_hex": color_hex,
+                },
+                "tracking_type": tracking_type,
+                "repeat_frequency": rng.choice(FREQUENCIES),
+                "start_date": _iso(habit_start),
+                "until_date": None,
+                "target_value": rng.randint(10, 90) if tracking_type == "progress" else None,
+                "unit": rng.choice(UNITS) if tracking_type == "progress" else None,
+                "exceptions": exceptions,
+            }
+        )
+
+    return {
+        "user_id": user_id,
+        "start_date": _iso(start_date),
+        "end_date": _iso(end_date),
+        "habits": habits,
+    }
+
+
+def generate_ai_response_text(suggestion_count: int = 5, seed: int = 42) -> str:
+    """A Gemini-style answer (JSON array wrapped in a markdown fence) for the parser."""
+    rng = random.Random(seed)
+    suggestions: List[dict] = []
+    for s in range(suggestion_count):
+        category_id, category_name, color_hex = rng.choice(CATEGORIES)
+        suggestions.append(
+            {
+                "id": f"suggestion-{s}",
+                "userId": "bench_user",
+                "title": f"{rng.choice(HABIT_NAMES)} every day",
+                "description": "Start small and build the habit step by step. " * 3,
+                "habit": {
+                    "id": f"habit-{s}",
+                    "name": rng.choice(HABIT_NAMES),
+                    "userId": "bench_user",
+                    "category": {
+                        "id": category_id,
+                        "name": category_name,
+                        "iconPath": f"assets/icons/{category_id}.png",
+                        "colorHex": color_hex,
+                    },
+                    "date": "2025-03-01T00:00:00Z",
+                    "series": {
+                        "id": f"series-{s}",
+                        "userId": "bench_user",
+                        "habitId": f"habit-{s}",
+                        "startDate": "2025-03-01T00:00:00Z",
+                        "untilDate": None,
+                        "repeatFrequency": rng.choice(FREQUENCIES),
+                    },
+                    "reminderEnabled": True,
+                    "trackingType": "complete",
+                    "targetValue": None,
+                    "currentValue": 0,
+                    "unit": None,
+                    "isCompleted": False,
+                },
+            }
+        )
+    return "```json\n" + json.dumps(suggestions, indent=2) + "\n```"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic analysis payload.")
+    parser.add_argument("--habits", type=int, default=500)
+    parser.add_argument("--exceptions", type=int, default=5, help="Per habit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="File to write (default: stdout)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    payload = generate_habit_analysis_input(args.habits, args.exceptions, seed=args.seed)
+    text = json.dumps(payload, indent=4)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"✅ Wrote {args.habits} habits ({len(text):,} bytes) to {args.output}")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
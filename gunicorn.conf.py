@@ -0,0 +1,22 @@
+import os
+import shutil
+
+# Loaded automatically by gunicorn from the working directory (see Procfile).
+# With PROMETHEUS_MULTIPROC_DIR set, each worker writes its metrics to that directory
+# and /metrics aggregates them across workers.
+
+
+def on_starting(server):
+    # Metrics files left over from a previous run would be added to the new totals
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (in-flight requests, pool connections) of a dead worker
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,215 @@
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, text
+
+from app.database import SessionLocal, engine
+from app.models.category import Category
+from app.models.habit import Habit
+from app.models.habit_plan import HabitPlan
+from app.models.habit_series import HabitSeries
+from app.models.suggestion import Suggestion
+from app.models.user import User
+from app.services.analysis_input_service import build_analysis_input, get_active_user_ids
+from app.services.habit_fingerprint import changed_habit_ids
+from app.services.habit_plan_service import (
+    get_habit_plans_by_category,
+    invalidate_habit_plan_cache,
+)
+from app.services.suggestion_service import get_suggestion_by_user
+from app.services.suggestion_snapshot import get_fresh_snapshot
+
+# Run the service functions and relationship loads of the hot paths, capture the SQL
+# they actually emit, run EXPLAIN on every captured SELECT and check that the planner
+# uses the expected index for at least one of them.
+# Exits with status 1 if a scenario doesn't use its index. Needs seed data
+# (scripts/setup_database.py); scenarios without rows to start from are skipped.
+# python scripts/explain_queries.py
+
+SAMPLE_ID = "user_1"
+
+
+def _first(model):
+    return lambda db: db.query(model).first()
+
+
+def _first_user_id(db):
+    return db.query(Suggestion.user_id).limit(1).scalar() or SAMPLE_ID
+
+
+def _plan_category_id(db):
+    return db.query(HabitPlan.category_id).limit(1).scalar()
+
+
+def _plans_by_category(db, category_id):
+    invalidate_habit_plan_cache()  # the cache would answer without a query
+    get_habit_plans_by_category(db, category_id)
+
+
+# (description, expected index, load the starting point, action whose SQL is checked)
+SCENARIOS = [
+    (
+        "suggestion_service.get_suggestion_by_user",
+        "ix_suggestions_user_id_created_at",
+        _first_user_id,
+        lambda db, user_id: get_suggestion_by_user(db, user_id, limit=5),
+    ),
+    (
+        "Habit.suggestions",
+        "ix_suggestions_habit_id",
+        _first(Habit),
+        lambda db, habit: habit.suggestions,
+    ),
+    (
+        "User.habits",
+        "ix_habits_user_id",
+        _first(User),
+        lambda db, user: user.habits,
+    ),
+    (
+        "Category.habits",
+        "ix_habits_category_id",
+        _first(Category),
+        lambda db, category: category.habits,
+    ),
+    (
+        "Habit.habit_series",
+        "ix_habit_series_habit_id",
+        _first(Habit),
+        lambda db, habit: habit.habit_series,
+    ),
+    (
+        "User.habit_series",
+        "ix_habit_series_user_id",
+        _first(User),
+        lambda db, user: user.habit_series,
+    ),
+    (
+        "HabitSeries.habit_exceptions",
+        "ix_habit_exceptions_habit_series_id_date",
+        _first(HabitSeries),
+        lambda db, series: series.habit_exceptions,
+    ),
+    (
+        "habit_plan_service.get_habit_plans_by_category",
+        "ix_habit_plans_category_id",
+        _plan_category_id,
+        _plans_by_category,
+    ),
+    (
+        "habit_plan_service.get_habit_plans_by_category (plan suggestions)",
+        "ix_habit_plan_suggestions_habit_plan_id",
+        _plan_category_id,
+        _plans_by_category,
+    ),
+    (
+        "habit_fingerprint.changed_habit_ids",
+        "habit_fingerprints_pkey",
+        _first_user_id,
+        lambda db, user_id: changed_habit_ids(db, user_id, {}),
+    ),
+    (
+        "suggestion_snapshot.get_fresh_snapshot",
+        "suggestion_snapshots_pkey",
+        _first_user_id,
+        lambda db, user_id: get_fresh_snapshot(db, user_id, ""),
+    ),
+    (
+        "analysis_input_service.get_active_user_ids",
+        "ix_analysis_inputs_received_at",
+        lambda db: datetime(2025, 1, 1),
+        get_active_user_ids,
+    ),
+    (
+        "analysis_input_service.build_analysis_input",
+        "analysis_inputs_pkey",
+        _first_user_id,
+        build_analysis_input,
+    ),
+]
+
+
+@contextmanager
+def capture_selects():
+    """Collect the SELECT statements (with their parameters) executed in the block."""
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def collect_index_names(plan_node: dict) -> set:
+    """Recursively collect the index names used by a JSON plan node."""
+    names = set()
+    if "Index Name" in plan_node:
+        names.add(plan_node["Index Name"])
+    for child in plan_node.get("Plans", []):
+        names |= collect_index_names(child)
+    return names
+
+
+def explain(db, statement: str, parameters) -> dict:
+    result = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    ).scalar()
+    return result[0]["Plan"]
+
+
+def run_scenario(description, expected_index, load, action) -> bool:
+    db = SessionLocal()
+    try:
+        # Seed tables are tiny, so without this the planner rightly prefers a seq scan.
+        # We only want to know whether a usable index exists for each query.
+        db.execute(text("SET enable_seqscan = off"))
+
+        start = load(db)
+        if start is None:
+            print(f"⚠️ {description}: no rows to start from, skipped")
+            return True
+        with capture_selects() as statements:
+            action(db, start)
+
+        used = set()
+        for statement, parameters in statements:
+            used |= collect_index_names(explain(db, statement, parameters))
+        if expected_index in used:
+            print(f"✅ {description}: {expected_index} ({len(statements)} statements)")
+            return True
+        print(
+            f"❌ {description}: expected {expected_index}, "
+            f"planner used {sorted(used) or 'no index'} in {len(statements)} statements"
+        )
+        for statement, _ in statements:
+            print(f"   {' '.join(statement.split())[:160]}")
+        return False
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    if engine.dialect.name != "postgresql":
+        print("❌ EXPLAIN output is only checked on PostgreSQL.")
+        sys.exit(1)
+
+    failures = sum(not run_scenario(*scenario) for scenario in SCENARIOS)
+    if failures:
+        print(f"{failures} quer{'y' if failures == 1 else 'ies'} not using an index.")
+        sys.exit(1)
+    print("All service queries use an index.")
+
+
+if __name__ == "__main__":
+    main()
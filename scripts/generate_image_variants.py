@@ -0,0 +1,80 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.utils.static_files import ImageVariant
+
+# Pre-generate smaller copies of the plan images, served via /habit-plans?image_variant=thumb.
+# Each variant is written to a sub-directory, e.g. static/images/plans/thumb/deep_work.png.
+# Requires Pillow: pip install Pillow
+# python scripts/generate_image_variants.py
+# python scripts/generate_image_variants.py --directory static/images/plans --force
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Maximum width in pixels for each variant (height keeps the aspect ratio)
+VARIANT_WIDTHS = {
+    ImageVariant.THUMB: 240,
+    ImageVariant.MEDIUM: 480,
+}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate resized image variants.")
+    parser.add_argument(
+        "--directory",
+        default=str(PROJECT_ROOT / "static" / "images" / "plans"),
+        help="Directory containing the original images",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Regenerate variants that already exist"
+    )
+    return parser.parse_args()
+
+
+def generate_variants(directory: Path, force: bool):
+    try:
+        from PIL import Image
+    except ImportError:
+        print("❌ Pillow is required: pip install Pillow")
+        sys.exit(1)
+
+    sources = sorted(p for p in directory.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    for variant, max_width in VARIANT_WIDTHS.items():
+        target_dir = directory / variant.value
+        target_dir.mkdir(exist_ok=True)
+
+        for source in sources:
+            target = target_dir / source.name
+            if target.exists() and not force:
+                continue
+
+            with Image.open(source) as image:
+                if image.width <= max_width:
+                    # The original already fits, the API falls back to it
+                    continue
+                height = round(image.height * max_width / image.width)
+                # Palette images are resized in RGBA (P mode would force nearest-neighbour)
+                resized = image.convert("RGBA").resize((max_width, height), Image.LANCZOS)
+                if image.mode == "P":
+                    resized = resized.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+                resized.save(target, optimize=True)
+
+            print(
+                f"✅ {target}: {source.stat().st_size:,} -> {target.stat().st_size:,} bytes"
+            )
+
+
+def main():
+    args = parse_args()
+    generate_variants(Path(args.directory), args.force)
+    print("🎉 Image variants generated!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import sys
+import argparse
+import uuid
+
+from sqlalchemy import text
+
+# Add project root to sys.path to import app.*
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from app.database import engine, to_uuid_string
+
+# Convert server-generated ID columns between varchar and native PostgreSQL UUID.
+# Run it before switching USE_NATIVE_UUID in .env, the app must match the column types.
+# Deliberately not an Alembic revision: the migrations give every database the same
+# (varchar) schema, and only this explicit command changes the ID column types.
+# Legacy non-UUID IDs are rewritten to their uuid5 value, a breaking change for clients
+# that stored them (see README); the originals are kept in LEGACY_ID_TABLE.
+
+# 1. Migrate existing rows to native UUID columns, then set USE_NATIVE_UUID=true
+# python scripts/migrate_native_uuid.py --direction to-uuid
+
+# 2. Revert to varchar columns (legacy IDs are restored), then set USE_NATIVE_UUID=false
+# python scripts/migrate_native_uuid.py --direction to-string
+
+# Columns declared with UUIDString in app/models (table, column)
+UUID_COLUMNS = [
+    ("habits", "id"),
+    ("habits", "habit_series_id"),
+    ("suggestions", "id"),
+    ("suggestions", "habit_id"),
+    ("habit_series", "id"),
+    ("habit_series", "habit_id"),
+    ("habit_exceptions", "id"),
+    ("habit_exceptions", "habit_series_id"),
+    ("habit_plan_suggestions", "id"),
+    ("habit_plan_suggestions", "suggestion_id"),
+    ("performance_metrics", "id"),
+    ("performance_metrics", "habit_id"),
+]
+
+# Keeps the original value of every non-UUID ID so the migration can be reverted
+LEGACY_ID_TABLE = "legacy_ids"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Convert ID columns between varchar and native UUID."
+    )
+    parser.add_argument(
+        "--direction",
+        choices=["to-uuid", "to-string"],
+        required=True,
+        help="'to-uuid' migrates to native UUID columns, 'to-string' reverts it.",
+    )
+    return parser.parse_args()
+
+
+def column_type(conn, table, column):
+    return conn.execute(
+        text(
+            """
+            SELECT data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = :table AND column_name = :column
+            """
+        ),
+        {"table": table, "column": column},
+    ).scalar()
+
+
+def drop_foreign_keys(conn):
+    """Drop FKs touching the converted columns and return their definitions."""
+    tables = sorted({table for table, _ in UUID_COLUMNS})
+    rows = conn.execute(
+        text(
+            """
+            SELECT conrelid::regclass::text AS table_name, conname,
+                   pg_get_constraintdef(oid) AS definition
+            FROM pg_constraint
+            WHERE contype = 'f'
+              AND (conrelid::regclass::text = ANY(:tables)
+                   OR confrelid::regclass::text = ANY(:tables))
+            """
+        ),
+        {"tables": tables},
+    ).fetchall()
+
+    for row in rows:
+        conn.execute(text(f'ALTER TABLE {row.table_name} DROP CONSTRAINT "{row.conname}"'))
+    print(f"Dropped {len(rows)} foreign keys.")
+    return rows
+
+
+def restore_foreign_keys(conn, foreign_keys):
+    for row in foreign_keys:
+        conn.execute(
+            text(f'ALTER TABLE {row.table_name} ADD CONSTRAINT "{row.conname}" {row.definition}')
+        )
+    print(f"Restored {len(foreign_keys)} foreign keys.")
+
+
+def migrate_to_uuid(conn):
+    pending = [(t, c) for t, c in UUID_COLUMNS if column_type(conn, t, c) != "uuid"]
+    if not pending:
+        print("All ID columns already use native UUID. Nothing to do.")
+        return
+
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {LEGACY_ID_TABLE} "
+            "(legacy_id VARCHAR PRIMARY KEY, id UUID NOT NULL)"
+        )
+    )
+
+    # Map every non-UUID value with the same uuid5 function the app uses at bind time
+    legacy_ids = set()
+    for table, column in pending:
+        values = conn.execute(
+            text(f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL")
+        ).scalars()
+        for value in values:
+            try:
+                uuid.UUID(value)
+            except ValueError:
+                legacy_ids.add(value)
+
+    if legacy_ids:
+        conn.execute(
+            text(
+                f"INSERT INTO {LEGACY_ID_TABLE} (legacy_id, id) VALUES (:legacy_id, :id) "
+                "ON CONFLICT (legacy_id) DO NOTHING"
+            ),
+            [{"legacy_id": v, "id": to_uuid_string(v)} for v in legacy_ids],
+        )
+    print(f"Mapped {len(legacy_ids)} legacy IDs to UUIDs.")
+
+    foreign_keys = drop_foreign_keys(conn)
+    for table, column in pending:
+        conn.execute(
+            text(
+                f"UPDATE {table} SET {column} = m.id::text FROM {LEGACY_ID_TABLE} m "
+                f"WHERE {table}.{column} = m.legacy_id"
+            )
+        )
+        conn.execute(
+            text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE UUID USING {column}::uuid")
+        )
+        print(f"✅ {table}.{column} -> uuid")
+    restore_foreign_keys(conn, foreign_keys)
+
+
+def migrate_to_string(conn):
+    pending = [(t, c) for t, c in UUID_COLUMNS if column_type(conn, t, c) == "uuid"]
+    if not pending:
+        print("All ID columns already use varchar. Nothing to do.")
+        return
+
+    has_legacy_table = column_type(conn, LEGACY_ID_TABLE, "legacy_id") is not None
+
+    foreign_keys = drop_foreign_keys(conn)
+    for table, column in pending:
+        conn.execute(
+            text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE VARCHAR USING {column}::text"
+            )
+        )
+        if has_legacy_table:
+            conn.execute(
+                text(
+                    f"UPDATE {table} SET {column} = m.legacy_id FROM {LEGACY_ID_TABLE} m "
+                    f"WHERE {table}.{column} = m.id::text"
+                )
+            )
+        print(f"✅ {table}.{column} -> varchar")
+    restore_foreign_keys(conn, foreign_keys)
+
+
+def main():
+    args = parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("❌ Native UUID columns are only supported on PostgreSQL.")
+        sys.exit(1)
+
+    try:
+        # Single transaction: either every column is converted or none is
+        with engine.begin() as conn:
+            if args.direction == "to-uuid":
+                migrate_to_uuid(conn)
+            else:
+                migrate_to_string(conn)
+    except Exception as e:
+        print(f"❌ Error when migrating ID columns: {e}")
+        sys.exit(1)
+
+    print("🎉 Migration completed!")
+    flag = "true" if args.direction == "to-uuid" else "false"
+    print(f"👉 Now set USE_NATIVE_UUID={flag} in .env and restart the app.")
+
+
+if __name__ == "__main__":
+    main()
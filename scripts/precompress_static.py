@@ -0,0 +1,74 @@
+import os
+import argparse
+import gzip
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Write .gz (and .br if brotli is installed) next to every file in static/, served by
+# PrecompressedStaticFiles. A sidecar is only kept when it saves at least --min-saving,
+# already-compressed formats such as PNG usually don't qualify.
+# python scripts/precompress_static.py
+# python scripts/precompress_static.py --directory static/images/plans --min-saving 0.05
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompress static files.")
+    parser.add_argument(
+        "--directory", default=str(PROJECT_ROOT / "static"), help="Directory to walk"
+    )
+    parser.add_argument(
+        "--min-saving",
+        type=float,
+        default=0.05,
+        help="Keep a sidecar only if it is at least this fraction smaller (default: 0.05)",
+    )
+    return parser.parse_args()
+
+
+def encoders():
+    result = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        result.append((".br", lambda data: brotli.compress(data, quality=11)))
+    else:
+        print("⚠️ brotli is not installed, only writing .gz files.")
+    return result
+
+
+def precompress(directory: Path, min_saving: float):
+    written = skipped = 0
+    compressors = encoders()
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith((".gz", ".br")):
+                continue
+            source = Path(root) / name
+            data = source.read_bytes()
+
+            for extension, compress in compressors:
+                target = source.with_name(source.name + extension)
+                compressed = compress(data)
+                if len(compressed) <= len(data) * (1 - min_saving):
+                    target.write_bytes(compressed)
+                    written += 1
+                    print(f"✅ {target}: {len(data):,} -> {len(compressed):,} bytes")
+                else:
+                    # Not worth it: remove a stale sidecar so the original is served
+                    if target.exists():
+                        target.unlink()
+                    skipped += 1
+    print(f"Wrote {written} precompressed files, skipped {skipped} with too little saving.")
+
+
+def main():
+    args = parse_args()
+    precompress(Path(args.directory), args.min_saving)
+
+
+if __name__ == "__main__":
+    main()
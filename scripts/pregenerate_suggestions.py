@@ -0,0 +1,102 @@
+import sys
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add root directory to sys.path to enable imports from app
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal
+from app.services.analysis_input_service import build_analysis_input, get_active_user_ids
+from app.services.habit_service import calculate_performance_metrics
+from app.services.suggestion_service import has_fresh_snapshot, pregenerate_suggestions
+
+# Nightly job: generate AI suggestions for active users ahead of time and store them as
+# snapshots, which /suggestions/analyze serves while the user's habits haven't changed
+# (SUGGESTION_SNAPSHOT_MAX_AGE_HOURS). Each user's last /suggestions/analyze payload is
+# replayed (analysis_input_service). Users whose snapshot is still fresh are skipped.
+# AI calls are spaced to stay under --rpm, run it off-peak so the interactive path
+# keeps the rest of the provider's budget.
+
+# python scripts/pregenerate_suggestions.py
+# python scripts/pregenerate_suggestions.py --active-days 3 --rpm 10
+# Cron, every night at 03:00:
+# 0 3 * * * cd /app && python scripts/pregenerate_suggestions.py >> /var/log/lfl_pregenerate.log 2>&1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pre-generate suggestions for active users.")
+    parser.add_argument(
+        "--active-days",
+        type=int,
+        default=7,
+        help="Users who called /suggestions/analyze in the last N days",
+    )
+    parser.add_argument(
+        "--rpm", type=float, default=10, help="AI requests per minute for this job"
+    )
+    parser.add_argument("--limit", type=int, help="Process at most N users")
+    parser.add_argument("--user", action="append", help="Only these user IDs (repeatable)")
+    return parser.parse_args()
+
+
+async def run(args) -> dict:
+    counts = {"generated": 0, "fresh": 0, "no_habits": 0, "failed": 0}
+    interval = 60.0 / args.rpm
+
+    db = SessionLocal()
+    try:
+        user_ids = args.user or get_active_user_ids(
+            db, datetime.now() - timedelta(days=args.active_days)
+        )
+        if args.limit:
+            user_ids = user_ids[: args.limit]
+        print(f"👥 {len(user_ids)} active users")
+
+        last_call = 0.0
+        for user_id in user_ids:
+            habit_input = build_analysis_input(db, user_id)
+            if habit_input is None or not habit_input.habits:
+                counts["no_habits"] += 1
+                continue
+            habit_input = calculate_performance_metrics(habit_input)
+            if has_fresh_snapshot(db, habit_input):
+                counts["fresh"] += 1
+                continue
+
+            # Stay under the rate budget
+            wait = last_call + interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last_call = time.monotonic()
+            try:
+                suggestions = await pregenerate_suggestions(db, habit_input)
+            except Exception as e:
+                db.rollback()
+                counts["failed"] += 1
+                print(f"❌ {user_id}: {e}")
+                continue
+            counts["generated"] += 1
+            print(f"✅ {user_id}: {len(suggestions)} suggestions")
+    finally:
+        db.close()
+    return counts
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    counts = asyncio.run(run(args))
+    print(
+        f"🏁 Done in {time.perf_counter() - start:.1f}s: {counts['generated']} generated, "
+        f"{counts['fresh']} still fresh, {counts['no_habits']} without habits, "
+        f"{counts['failed']} failed"
+    )
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.services import ai_client
+from app.services.ai_client import (
+    AIBackend,
+    AIBackendError,
+    AIRateLimitError,
+    AIResponse,
+    AITimeoutError,
+    generate_with_retry,
+)
+from app.services.ai_router import AIRouter
+
+
+class ScriptedBackend(AIBackend):
+    """
+    Raises the scripted errors in turn (None answers), then answers, or with `error`
+    fails every call. Appends its name to `calls` per call.
+    """
+
+    def __init__(self, name, outcomes=(), calls=None, error=None):
+        self.name = name
+        self.outcomes = list(outcomes)
+        self.calls = [] if calls is None else calls
+        self.error = error
+
+    async def generate(self, prompt, response_schema=None):
+        self.calls.append(self.name)
+        error = self.outcomes.pop(0) if self.outcomes else self.error
+        if error is not None:
+            raise error
+        return AIResponse(f"answer from {self.name}")
+
+
+def failing(name, calls=None):
+    return ScriptedBackend(name, calls=calls, error=AIBackendError("500 Internal error"))
+
+
+@pytest.fixture(autouse=True)
+def short_delays(monkeypatch):
+    monkeypatch.setattr(ai_client, "AI_RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(ai_client, "AI_RETRY_MAX_DELAY", 1.0)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [AIBackendError("500 Internal error"), AIRateLimitError("429", retry_after=0.01)],
+    ids=["backend_error", "rate_limited"],
+)
+def test_transient_errors_are_retried(error):
+    backend = ScriptedBackend("a", [error, error])
+
+    response = run(generate_with_retry("prompt", backend, attempts=3))
+
+    assert response.text == "answer from a"
+    assert backend.calls == ["a", "a", "a"]
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        google_exceptions.InvalidArgument("400 bad request"),
+        AIRateLimitError("429", retry_after=60),  # over AI_RETRY_MAX_DELAY
+        ValueError("No AI backend registered"),
+        AITimeoutError("Request deadline exceeded"),
+    ],
+    ids=["client_error", "long_retry_after", "value_error", "timeout"],
+)
+def test_permanent_errors_are_not_retried(error):
+    backend = ScriptedBackend("a", [error])
+
+    with pytest.raises(type(error)):
+        run(generate_with_retry("prompt", backend, attempts=3))
+    assert backend.calls == ["a"]
+
+
+def test_last_error_is_raised_when_attempts_run_out():
+    backend = failing("a")
+
+    with pytest.raises(AIBackendError):
+        run(generate_with_retry("prompt", backend, attempts=3))
+    assert backend.calls == ["a", "a", "a"]
+
+
+def test_router_cools_a_rate_limited_backend_down():
+    router = AIRouter()
+    router.register(ScriptedBackend("a", [AIRateLimitError("429", retry_after=30)]))
+    router.register(ScriptedBackend("b"))
+
+    response = run(router.generate("prompt"))
+
+    assert response.backend == "b"
+    assert [r.backend.name for r in router.ranked()] == ["b", "a"]
+    assert router.ranked()[1].stats.cooldown_until > time.monotonic() + 25
+
+
+def test_router_uses_a_backend_again_after_its_cooldown():
+    router = AIRouter()
+    router.register(ScriptedBackend("a", [AIRateLimitError("429", retry_after=0.01)]))
+    router.register(ScriptedBackend("b", [AIBackendError("500")]))
+
+    with pytest.raises(AIBackendError):
+        run(router.generate("prompt"))
+    time.sleep(0.02)
+
+    assert run(router.generate("prompt")).backend == "a"
+
+
+def test_fallback_is_only_tried_on_the_last_attempt():
+    calls = []
+    router = AIRouter()
+    router.register(failing("a", calls))
+    router.register(failing("b", calls))
+    router.register(ScriptedBackend("sample", calls=calls), fallback=True)
+
+    response = run(generate_with_retry("prompt", router, attempts=3))
+
+    assert response.fallback
+    assert response.backend == "sample"
+    assert calls == ["a", "b", "a", "b", "a", "b", "sample"]
+
+
+def test_fallback_is_not_used_when_a_retry_succeeds():
+    calls = []
+    router = AIRouter()
+    router.register(ScriptedBackend("a", [AIBackendError("500")], calls))
+    router.register(ScriptedBackend("sample", calls=calls), fallback=True)
+
+    response = run(generate_with_retry("prompt", router, attempts=3))
+
+    assert not response.fallback
+    assert calls == ["a", "a"]
+
+
+def test_router_with_only_fallbacks_uses_them():
+    router = AIRouter()
+    router.register(ScriptedBackend("sample"), fallback=True)
+
+    response = run(generate_with_retry("prompt", router, attempts=3))
+
+    assert response.backend == "sample"
+    assert response.fallback
@@ -0,0 +1,145 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.suggestion import Suggestion as SuggestionModel
+from app.schemas.suggestion_schema import SuggestionResponse
+from app.services import suggestion_dedup
+from app.services.suggestion_dedup import (
+    estimate_similarity,
+    filter_duplicate_suggestions,
+    minhash_signature,
+)
+from app.services.suggestion_service import save_suggestions
+from app.utils.id_generator import generate_uuid
+
+USER_ID = "user_dedup"
+
+
+def make_suggestion(title: str, description: str, habit_name: str = "Drink water"):
+    return SuggestionResponse(
+        id=generate_uuid(),
+        user_id=USER_ID,
+        title=title,
+        description=description,
+        created_at=datetime(2026, 1, 1),
+        habit={
+            "id": generate_uuid(),
+            "userId": USER_ID,
+            "name": habit_name,
+            "category": {"id": "health", "name": "Health"},
+            "date": datetime(2026, 1, 1),
+        },
+    )
+
+
+HYDRATE = make_suggestion(
+    "Stay Hydrated Regularly", "Drink a glass of water every two hours during the day."
+)
+HYDRATE_REWORDED = make_suggestion(
+    "Stay hydrated regularly!", "Drink a glass of water every two hours during the day"
+)
+HYDRATE_LESS_OFTEN = make_suggestion(
+    "Stay Hydrated", "Drink a glass of water every three hours during the day."
+)
+JOURNAL = make_suggestion(
+    "Write in a Journal", "Spend ten minutes writing before bed.", "Journaling"
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(suggestion_dedup, "SUGGESTION_DEDUP_ENABLED", True)
+    suggestion_dedup._indexes.clear()
+    yield
+    suggestion_dedup._indexes.clear()
+
+
+def rows(*suggestions):
+    return [(generate_uuid(), s) for s in suggestions]
+
+
+def saved_ids(db):
+    return {
+        row.id
+        for row in db.query(SuggestionModel).filter(SuggestionModel.user_id == USER_ID)
+    }
+
+
+def test_identical_text_has_similarity_one():
+    signature = minhash_signature("Stay Hydrated Regularly")
+    assert estimate_similarity(signature, minhash_signature("stay hydrated, regularly")) == 1.0
+
+
+def test_rewording_is_similar_and_other_topics_are_not():
+    hydrate = minhash_signature(HYDRATE.title + " " + HYDRATE.description)
+    reworded = minhash_signature(HYDRATE_REWORDED.title + " " + HYDRATE_REWORDED.description)
+    journal = minhash_signature(JOURNAL.title + " " + JOURNAL.description)
+    assert estimate_similarity(hydrate, reworded) >= suggestion_dedup.SUGGESTION_DEDUP_THRESHOLD
+    assert estimate_similarity(hydrate, journal) < suggestion_dedup.SUGGESTION_DEDUP_THRESHOLD
+
+
+def test_near_duplicates_in_one_batch_are_dropped(db):
+    unique = filter_duplicate_suggestions(db, USER_ID, rows(HYDRATE, HYDRATE_REWORDED, JOURNAL))
+    assert [s for _, s in unique] == [HYDRATE, JOURNAL]
+
+
+def test_threshold_decides_what_counts_as_duplicate(db, monkeypatch):
+    monkeypatch.setattr(suggestion_dedup, "SUGGESTION_DEDUP_THRESHOLD", 0.5)
+    unique = filter_duplicate_suggestions(db, USER_ID, rows(HYDRATE, HYDRATE_LESS_OFTEN))
+    assert [s for _, s in unique] == [HYDRATE]
+
+    suggestion_dedup._indexes.clear()
+    monkeypatch.setattr(suggestion_dedup, "SUGGESTION_DEDUP_THRESHOLD", 0.9)
+    unique = filter_duplicate_suggestions(db, USER_ID, rows(HYDRATE, HYDRATE_LESS_OFTEN))
+    assert [s for _, s in unique] == [HYDRATE, HYDRATE_LESS_OFTEN]
+
+
+def test_disabled_keeps_everything(db, monkeypatch):
+    monkeypatch.setattr(suggestion_dedup, "SUGGESTION_DEDUP_ENABLED", False)
+    batch = rows(HYDRATE, HYDRATE_REWORDED)
+    assert filter_duplicate_suggestions(db, USER_ID, batch) == batch
+
+
+def test_saved_suggestions_are_indexed_by_their_row_id(db):
+    save_suggestions(db, [HYDRATE, JOURNAL], USER_ID)
+
+    index = suggestion_dedup._indexes[USER_ID]
+    assert set(index._signatures) == saved_ids(db)
+    assert HYDRATE.id not in index._signatures
+
+
+def test_index_rebuilt_from_the_database_matches(db):
+    save_suggestions(db, [HYDRATE, JOURNAL], USER_ID)
+    built_while_saving = dict(suggestion_dedup._indexes[USER_ID]._signatures)
+
+    suggestion_dedup._indexes.clear()
+    assert filter_duplicate_suggestions(db, USER_ID, rows(HYDRATE_REWORDED)) == []
+    assert suggestion_dedup._indexes[USER_ID]._signatures == built_while_saving
+
+
+def test_suggestions_without_habit_are_not_indexed(db):
+    no_habit = HYDRATE.model_copy(update={"habit": None})
+    save_suggestions(db, [no_habit], USER_ID)
+
+    assert saved_ids(db) == set()
+    assert USER_ID not in suggestion_dedup._indexes or not len(
+        suggestion_dedup._indexes[USER_ID]
+    )
+
+
+def test_failed_commit_invalidates_the_index(db, monkeypatch):
+    def failing_commit():
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        save_suggestions(db, [HYDRATE], USER_ID)
+    db.rollback()
+    monkeypatch.undo()
+    monkeypatch.setattr(suggestion_dedup, "SUGGESTION_DEDUP_ENABLED", True)
+
+    # The unsaved suggestion must not block saving it again
+    assert USER_ID not in suggestion_dedup._indexes
+    save_suggestions(db, [HYDRATE], USER_ID)
+    assert len(saved_ids(db)) == 1